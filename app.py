@@ -1,51 +1,690 @@
-from flask import Flask, render_template, request, session, redirect, url_for, jsonify, flash, has_request_context, send_from_directory
+from flask import Flask, g, Response, abort, render_template, request, session, redirect, url_for, jsonify, flash, send_from_directory
 from flask_session import Session
+from flask_session.base import ServerSideSessionInterface
+import click
 import base64
+import bisect
+import collections
+import concurrent.futures
+import contextlib
 import csv
+import email.utils
 import hashlib
+import heapq
+import http.client
+import io
+import itertools
 import os
+import queue
 import random
-from datetime import datetime, timedelta
+import re
+import shutil
+import socket
+import sqlite3
+import tempfile
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 import json
 import ssl
 import traceback
+import threading
 import unicodedata
-import urllib.error
-import urllib.request
-from threading import Thread
+import urllib.parse
+import uuid
 import time
 from werkzeug.middleware.proxy_fix import ProxyFix
 import certifi
 
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+try:
+    from PIL import Image as PILImage
+except ImportError:  # Pillow is optional; without it only full-size hints are served
+    PILImage = None
+
 app = Flask(__name__)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
 app.secret_key = os.getenv('FLASK_SESSION_SECRET_KEY') or 'local-dev-session-secret'
 
-OPENAI_API_BASE = "https://api.openai.com/v1"
+# When set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class MetricsRegistry:
+    """Minimal Prometheus text-format registry: labelled counters and histograms.
+
+    Point-in-time values (job-store sizes, pool and cache stats) are not
+    stored here; collectors registered with ``add_collector`` produce them
+    at scrape time.
+    """
+
+    def __init__(self):
+        self._meta = {}  # name -> (type, help, buckets)
+        self._values = {}  # name -> {label_tuple: value or [bucket_counts, sum, count]}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        self._meta[name] = ('counter', help_text, None)
+        self._values[name] = {}
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ('histogram', help_text, buckets)
+        self._values[name] = {}
+
+    def inc(self, name, labels, amount=1):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values[name]
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = self._meta[name][2]
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._values[name].get(key)
+            if series is None:
+                series = self._values[name][key] = [[0] * len(buckets), 0.0, 0]
+            index = bisect.bisect_left(buckets, value)
+            if index < len(buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def add_collector(self, collector):
+        """``collector()`` returns ``[(name, type, help, [(labels, value)])]``."""
+        self._collectors.append(collector)
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        escaped = []
+        for name, value in labels:
+            value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            escaped.append(f'{name}="{value}"')
+        return '{' + ','.join(escaped) + '}'
+
+    def render(self):
+        lines = []
+        with self._lock:
+            snapshot = {
+                name: {key: (list(value[0]), value[1], value[2]) if isinstance(value, list) else value for key, value in series.items()}
+                for name, series in self._values.items()
+            }
+        for name, (metric_type, help_text, buckets) in self._meta.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for key, value in sorted(snapshot[name].items()):
+                if metric_type == 'counter':
+                    lines.append(f"{name}{self._labels(key)} {value}")
+                    continue
+                bucket_counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{self._labels(key + (('le', repr(float(bound))),))} {cumulative}")
+                lines.append(f"{name}_bucket{self._labels(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{self._labels(key)} {total}")
+                lines.append(f"{name}_count{self._labels(key)} {count}")
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception:
+                print(traceback.format_exc())
+                continue
+            for name, metric_type, help_text, samples in families:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                for labels, value in samples:
+                    lines.append(f"{name}{self._labels(tuple(sorted(labels.items())))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.histogram('http_request_duration_seconds', 'Time to produce the response headers, by route.')
+METRICS.histogram('openai_request_duration_seconds', 'OpenAI API call latency (whole stream for streamed calls).')
+METRICS.histogram('openai_first_event_seconds', 'Time to the first server-sent event of a streamed OpenAI call.')
+METRICS.counter('openai_tokens_total', 'Tokens reported in the OpenAI usage field.')
+METRICS.histogram('background_queue_wait_seconds', 'Time background tasks waited in the executor queue.')
+
+
+def _openai_labels(path, payload):
+    return {
+        'path': path,
+        'model': payload.get('model', ''),
+        'effort': (payload.get('reasoning') or {}).get('effort', ''),
+    }
+
+
+def _record_openai_usage(labels, usage):
+    for kind in ('input_tokens', 'output_tokens'):
+        if usage and usage.get(kind):
+            METRICS.inc('openai_tokens_total', {**labels, 'kind': kind.split('_')[0]}, usage[kind])
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def _record_request_timing(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        METRICS.observe('http_request_duration_seconds', {
+            'route': request.url_rule.rule if request.url_rule else 'unmatched',
+            'method': request.method,
+            'status': str(response.status_code),
+        }, time.perf_counter() - started)
+    return response
+
+# Overridable so benchmarks can point the app at a local mock server
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
 OPENAI_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+OPENAI_POOL_SIZE = int(os.getenv("OPENAI_POOL_SIZE", "8"))
+OPENAI_POOL_IDLE_TIMEOUT = float(os.getenv("OPENAI_POOL_IDLE_TIMEOUT", "60"))
 
 
-def openai_post(path, payload, timeout=120):
+class HTTPConnectionPool:
+    """Thread-safe pool of keep-alive connections to a single API host.
+
+    Idle connections are reused LIFO so the warmest socket is picked first;
+    connections idle for longer than ``idle_timeout`` seconds are closed
+    instead of reused because the server has most likely dropped them.
+    """
+
+    def __init__(self, base_url, max_size=8, idle_timeout=60.0, ssl_context=None):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.base_path = parsed.path.rstrip('/')
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.ssl_context = ssl_context
+        self._idle = []  # [(last_used_monotonic, connection)]
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'handshakes': 0, 'expired': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        return stats
+
+    def _new_connection(self, timeout):
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout, context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def _acquire(self, timeout):
+        expired = []
+        now = time.monotonic()
+        conn = None
+        with self._lock:
+            while self._idle:
+                last_used, candidate = self._idle.pop()
+                if now - last_used <= self.idle_timeout:
+                    conn = candidate
+                    break
+                expired.append(candidate)
+            self._stats['expired'] += len(expired)
+            self._stats['hits' if conn else 'misses'] += 1
+        for stale in expired:
+            stale.close()
+
+        if conn is None:
+            return self._new_connection(timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((time.monotonic(), conn))
+                return
+        conn.close()
+
+    def _send(self, method, path, body, headers, timeout, on_connect=None):
+        for attempt in range(2):
+            conn, reused = self._acquire(timeout)
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                    self._count('handshakes')
+                if on_connect is not None:
+                    on_connect(conn)
+                conn.request(method, f"{self.base_path}{path}", body=body, headers=headers or {})
+                return conn, conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionError):
+                conn.close()
+                # The server may close an idle keep-alive socket between our
+                # liveness check and the write; retry once on a fresh one.
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+    def _finish(self, conn, response):
+        if response.isclosed() and not response.will_close:
+            self._release(conn)
+        else:
+            conn.close()
+
+    def request(self, method, path, body=None, headers=None, timeout=120, on_connect=None, on_done=None):
+        """Send a request and return ``(status, headers, body_bytes)``.
+
+        ``on_connect(conn)`` is called before the request is written, so
+        another thread can abort it by shutting the socket down;
+        ``on_done(conn)`` is called before the connection goes back to the
+        pool and returning False closes it instead.
+        """
+        conn, response = self._send(method, path, body, headers, timeout, on_connect)
+        try:
+            data = response.read()
+        except Exception:
+            conn.close()
+            raise
+        if on_done is not None and not on_done(conn):
+            conn.close()
+        else:
+            self._finish(conn, response)
+        return response.status, response.headers, data
+
+    @contextlib.contextmanager
+    def stream(self, method, path, body=None, headers=None, timeout=120):
+        """Send a request and yield the open response for incremental reads.
+
+        The connection goes back to the pool only if the caller consumed the
+        whole body; abandoned streams are closed.
+        """
+        conn, response = self._send(method, path, body, headers, timeout)
+        try:
+            yield response
+        except BaseException:
+            conn.close()
+            raise
+        self._finish(conn, response)
+
+
+OPENAI_POOL = HTTPConnectionPool(
+    OPENAI_API_BASE,
+    max_size=OPENAI_POOL_SIZE,
+    idle_timeout=OPENAI_POOL_IDLE_TIMEOUT,
+    ssl_context=OPENAI_SSL_CONTEXT,
+)
+
+
+# Per-attempt timeouts by call class: quick lookups must not hang as long as a story
+OPENAI_CALL_TIMEOUTS = {'fast': 30, 'standard': 90, 'long': 300, 'image': 180}
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+OPENAI_RETRY_BASE_SECONDS = 0.5
+OPENAI_RETRY_MAX_SECONDS = 20
+OPENAI_RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+# Short, unstructured calls in these classes get a duplicate request once they
+# pass the p95 observed for the same model and output limit
+OPENAI_HEDGE_CLASSES = ('fast', 'standard')
+OPENAI_HEDGE_MAX_OUTPUT_TOKENS = 500
+OPENAI_HEDGE_MIN_SAMPLES = 20
+OPENAI_BREAKER_FAILURES = 5
+OPENAI_BREAKER_COOLDOWN_SECONDS = 30
+
+
+class OpenAIError(RuntimeError):
+    """An OpenAI API call failed; ``status`` and ``retry_after`` come from the response."""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fail fast after repeated upstream failures instead of queueing more doomed calls.
+
+    Opens after ``failure_threshold`` consecutive failures; after
+    ``cooldown`` seconds a single trial call is let through (half-open), and
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold, cooldown):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'closed':
+                return True
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, ok):
+        with self._lock:
+            if ok:
+                self._failures = 0
+                self.state = 'closed'
+                return
+            self._failures += 1
+            if self.state == 'half_open' or self._failures >= self.failure_threshold:
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+
+
+class LatencyTracker:
+    """Recent successful call latencies per request shape, for hedging thresholds."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._samples = {}  # shape key -> deque of seconds
+        self._lock = threading.Lock()
+
+    def add(self, key, seconds):
+        with self._lock:
+            self._samples.setdefault(key, collections.deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, key, min_samples=OPENAI_HEDGE_MIN_SAMPLES):
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < min_samples:
+            return None
+        return samples[int(0.95 * (len(samples) - 1))]
+
+
+OPENAI_BREAKER = CircuitBreaker(OPENAI_BREAKER_FAILURES, OPENAI_BREAKER_COOLDOWN_SECONDS)
+OPENAI_LATENCY = LatencyTracker()
+METRICS.counter('openai_retries_total', 'OpenAI attempts retried, by call class and reason.')
+METRICS.counter('openai_hedges_total', 'Hedged duplicate OpenAI requests sent and won, by call class.')
+METRICS.counter('openai_breaker_rejections_total', 'OpenAI calls refused while the circuit breaker was open.')
+
+
+def _openai_call_class(path, payload):
+    if path.startswith('/images'):
+        return 'image'
+    if payload.get('model') == 'gpt-5-nano':
+        return 'fast'
+    if payload.get('model') == 'gpt-5' or (payload.get('reasoning') or {}).get('effort') in ('medium', 'high'):
+        return 'long'
+    return 'standard'
+
+
+def _openai_headers(accept=None):
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise RuntimeError("OPENAI_API_KEY environment variable is not set.")
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    if accept:
+        headers["Accept"] = accept
+    return headers
 
-    req = urllib.request.Request(
-        f"{OPENAI_API_BASE}{path}",
-        data=json.dumps(payload).encode("utf-8"),
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        method="POST",
-    )
+
+def _retry_after_seconds(headers):
+    """Seconds the server asked us to wait (retry-after-ms / Retry-After), or None."""
+    if headers is None:
+        return None
+    milliseconds = headers.get('retry-after-ms')
+    if milliseconds:
+        with contextlib.suppress(ValueError):
+            return float(milliseconds) / 1000
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    with contextlib.suppress(ValueError):
+        return float(value)
+    with contextlib.suppress(TypeError, ValueError):
+        return max(0.0, (email.utils.parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    return None
+
+
+def _raise_for_status(status, headers, body):
+    if status >= 400:
+        error_body = body.decode("utf-8", errors="replace")
+        raise OpenAIError(f"OpenAI API error {status}: {error_body}", status, _retry_after_seconds(headers))
+
+
+def _is_retryable(error):
+    if isinstance(error, OpenAIError):
+        return error.status in OPENAI_RETRY_STATUSES
+    # Timeouts, resets and protocol errors
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
+def _with_retries(call_class, attempt):
+    """Run ``attempt()`` behind the circuit breaker, retrying 429/5xx and transport errors.
+
+    Backoff is exponential with full jitter unless the server sent
+    Retry-After, which is honoured (capped at OPENAI_RETRY_MAX_SECONDS).
+    """
+    for retry in range(OPENAI_MAX_RETRIES + 1):
+        if not OPENAI_BREAKER.allow():
+            METRICS.inc('openai_breaker_rejections_total', {'class': call_class})
+            raise OpenAIError("OpenAI API is failing; circuit breaker open, try again shortly", status=503)
+        try:
+            result = attempt()
+        except Exception as e:
+            retryable = _is_retryable(e)
+            # Client errors mean upstream is reachable, so only retryable ones count as failures
+            OPENAI_BREAKER.record(not retryable)
+            if not retryable or retry == OPENAI_MAX_RETRIES:
+                raise
+            delay = getattr(e, 'retry_after', None)
+            if delay is None:
+                delay = random.uniform(0, OPENAI_RETRY_BASE_SECONDS * 2 ** retry)
+            METRICS.inc('openai_retries_total', {
+                'class': call_class, 'reason': str(getattr(e, 'status', None) or type(e).__name__),
+            })
+            time.sleep(min(delay, OPENAI_RETRY_MAX_SECONDS))
+            continue
+        OPENAI_BREAKER.record(True)
+        return result
+
+
+def _latency_key(path, payload):
+    """Calls that should take about as long as each other share a hedging threshold."""
+    return path, payload.get('model'), payload.get('max_output_tokens'), (payload.get('text') or {}).get('verbosity')
+
+
+def _hedgeable(call_class, payload):
+    # Hedging doubles the token cost of every call it fires for, so keep it
+    # to short free-text replies; structured and long outputs are never raced
+    text = payload.get('text') or {}
+    if call_class not in OPENAI_HEDGE_CLASSES or text.get('format'):
+        return False
+    max_output_tokens = payload.get('max_output_tokens')
+    if max_output_tokens is None:
+        return text.get('verbosity') == 'low'
+    return max_output_tokens <= OPENAI_HEDGE_MAX_OUTPUT_TOKENS
+
+
+class _HedgeRace:
+    """Connections of the attempts racing for one call; the losers' are shut down once it is decided."""
+
+    def __init__(self):
+        self.finished = False
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def register(self, conn):
+        with self._lock:
+            if not self.finished:
+                self._connections.append(conn)
+                return
+        raise OpenAIError("Hedged OpenAI request no longer needed")
+
+    def done(self, conn):
+        """Called before the pool takes ``conn`` back; False if it was shut down and must be closed."""
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+                return True
+            return False
+
+    def finish(self):
+        with self._lock:
+            self.finished = True
+            for conn in self._connections:
+                # Unblocks the loser's read; done() then tells the pool to close it
+                with contextlib.suppress(OSError, AttributeError):
+                    conn.sock.shutdown(socket.SHUT_RDWR)
+            self._connections = []
+
+
+def _hedged(call_class, latency_key, attempt):
+    """Run ``attempt(race)``; if it outlives the p95 for ``latency_key``, race a duplicate.
+
+    The first success wins and the other request's connection is shut down.
+    """
+    delay = OPENAI_LATENCY.p95(latency_key) if latency_key is not None else None
+    if delay is None:
+        return attempt(None)
+
+    race = _HedgeRace()
+    outcomes = queue.Queue()
+
+    def run(role):
+        try:
+            outcomes.put((role, attempt(race), None))
+        except Exception as e:
+            outcomes.put((role, None, e))
+
+    threading.Thread(target=run, args=('primary',), name='openai-primary', daemon=True).start()
+    pending = 1
+    try:
+        outcome = outcomes.get(timeout=delay)
+    except queue.Empty:
+        METRICS.inc('openai_hedges_total', {'class': call_class, 'outcome': 'sent'})
+        threading.Thread(target=run, args=('hedge',), name='openai-hedge', daemon=True).start()
+        pending = 2
+        outcome = outcomes.get()
+    while True:
+        role, result, error = outcome
+        pending -= 1
+        if error is None:
+            race.finish()
+            if role == 'hedge':
+                METRICS.inc('openai_hedges_total', {'class': call_class, 'outcome': 'won'})
+            return result
+        if pending == 0:
+            race.finish()
+            raise error
+        outcome = outcomes.get()
+
+
+def openai_post(path, payload, timeout=None):
+    """POST ``payload`` and return the decoded JSON, with retries, hedging and a circuit breaker."""
+    headers = _openai_headers()
+    body = json.dumps(payload).encode("utf-8")
+    labels = _openai_labels(path, payload)
+    call_class = _openai_call_class(path, payload)
+    timeout = timeout or OPENAI_CALL_TIMEOUTS[call_class]
+    latency_key = _latency_key(path, payload)
+
+    def attempt(race):
+        started = time.perf_counter()
+        status = 'error'
+        try:
+            status, response_headers, data = OPENAI_POOL.request(
+                "POST", path, body=body, headers=headers, timeout=timeout,
+                on_connect=race.register if race else None, on_done=race.done if race else None,
+            )
+        except Exception:
+            if race is not None and race.finished:
+                status = 'cancelled'
+            raise
+        finally:
+            METRICS.observe('openai_request_duration_seconds', {**labels, 'status': str(status)}, time.perf_counter() - started)
+        _raise_for_status(status, response_headers, data)
+        OPENAI_LATENCY.add(latency_key, time.perf_counter() - started)
+        return data
+
+    hedge_key = latency_key if _hedgeable(call_class, payload) else None
+    data = _with_retries(call_class, lambda: _hedged(call_class, hedge_key, attempt))
+    response_json = json.loads(data.decode("utf-8"))
+    _record_openai_usage(labels, response_json.get("usage"))
+    return response_json
+
+
+def openai_stream(path, payload, timeout=None):
+    """POST with ``stream: true`` and yield each server-sent event as a dict.
+
+    Failures before the first event are retried like openai_post; once
+    events are flowing, errors propagate to the caller.
+    """
+    headers = _openai_headers(accept="text/event-stream")
+    body = json.dumps({**payload, "stream": True}).encode("utf-8")
+    labels = _openai_labels(path, payload)
+    call_class = _openai_call_class(path, payload)
+    timeout = timeout or OPENAI_CALL_TIMEOUTS[call_class]
+    started = time.perf_counter()
+    meta = {'status': 'error'}
+    events = None
+
+    def first_event():
+        attempt_events = _openai_stream_events(path, body, headers, timeout, meta)
+        return attempt_events, next(attempt_events, None)
 
     try:
-        with urllib.request.urlopen(req, timeout=timeout, context=OPENAI_SSL_CONTEXT) as response:
-            return json.loads(response.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode("utf-8", errors="replace")
-        raise RuntimeError(f"OpenAI API error {e.code}: {error_body}") from e
+        events, event = _with_retries(call_class, first_event)
+        if event is None:
+            return
+        METRICS.observe('openai_first_event_seconds', labels, time.perf_counter() - started)
+        while event is not None:
+            if event.get("type") == "response.completed":
+                _record_openai_usage(labels, (event.get("response") or {}).get("usage"))
+            yield event
+            event = next(events, None)
+    finally:
+        if events is not None:
+            events.close()
+        METRICS.observe('openai_request_duration_seconds', {**labels, 'status': str(meta['status'])}, time.perf_counter() - started)
+
+
+def _openai_stream_events(path, body, headers, timeout, meta):
+    with OPENAI_POOL.stream("POST", path, body=body, headers=headers, timeout=timeout) as response:
+        meta['status'] = response.status
+        if response.status >= 400:
+            _raise_for_status(response.status, response.headers, response.read())
+
+        data_lines = []
+        while True:
+            raw_line = response.readline()
+            if not raw_line:
+                break
+            line = raw_line.decode("utf-8").rstrip("\r\n")
+            if line.startswith("data:"):
+                data_lines.append(line[5:].lstrip())
+                continue
+            if line or not data_lines:
+                continue
+            data = "\n".join(data_lines)
+            data_lines = []
+            if data != "[DONE]":
+                yield json.loads(data)
 
 
 def extract_response_text(response_json):
@@ -60,21 +699,680 @@ def extract_response_text(response_json):
         return response_json["output_text"]
     raise RuntimeError("OpenAI response did not include output text.")
 
-# Use server-side session storage
-app.config['SESSION_TYPE'] = 'filesystem'
-app.config['SESSION_FILE_DIR'] = os.path.join(os.getcwd(), 'flask_session_data')
+# Use server-side session storage. SESSION_BACKEND picks the store: 'sqlite'
+# (default, shared by worker processes), 'memory' (single process) or
+# 'filesystem' (the original Flask-Session file store).
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "sqlite")
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH") or os.path.join(os.getcwd(), 'sessions.sqlite3')
+SESSION_TTL = timedelta(hours=int(os.getenv("SESSION_TTL_HOURS", "24")))
+# Unchanged sessions only get their expiry pushed out this often
+SESSION_TOUCH_SECONDS = 300
+SESSION_PRUNE_SECONDS = 600
+
 app.config['SESSION_PERMANENT'] = False
 app.config['SESSION_USE_SIGNER'] = True
-Session(app)
+app.config['PERMANENT_SESSION_LIFETIME'] = SESSION_TTL
 
-# Store background results (use Redis or DB in production)
-story_results = {}  # Dict to hold story by session ID or custom token
-# Background sentences generation for Anki (Responses API)
-anki_sentences_jobs = {}  # { session_id: {status: 'in_progress'|'done'|'error', response: str, error: str} }
 
-# Background prefetch state for Anki translations
-# Keyed by f"{session_id}:{card_number}" and stores statuses/results
-anki_translation_jobs = {}
+class LeanSessionInterface(ServerSideSessionInterface):
+    """Server-side sessions stored one row per key, writing only dirty keys.
+
+    Each session value is msgpack-encoded on its own. On save, the encoded
+    values are compared with what was loaded, and only changed or removed
+    keys are written. A card flip therefore rewrites the few small keys it
+    touched, not the deck sentences or the conversation history. The
+    comparison is on encoded bytes, so nested values that are mutated in
+    place are caught too. Load and save times and the session size are
+    reported per request in a Server-Timing header and summed in stats().
+    """
+
+    def __init__(self, app):
+        super().__init__(
+            app,
+            key_prefix=app.config.get('SESSION_KEY_PREFIX', 'session:'),
+            use_signer=app.config['SESSION_USE_SIGNER'],
+            permanent=app.config['SESSION_PERMANENT'],
+        )
+        self._encoder = self.serializer.encoder
+        self._decoder = self.serializer.decoder
+        self._loaded = threading.local()
+        self._stats_lock = threading.Lock()
+        self._next_prune = 0.0
+        self._stats = {
+            'loads': 0, 'saves': 0, 'keys_written': 0, 'keys_deleted': 0, 'bytes_written': 0,
+            'load_seconds_total': 0.0, 'save_seconds_total': 0.0, 'size_bytes_max': 0,
+        }
+
+    def _count(self, **amounts):
+        with self._stats_lock:
+            for name, amount in amounts.items():
+                self._stats[name] += amount
+
+    # Storage backends implement these
+    def _load_rows(self, store_id, now):
+        """Return ``{key: encoded_value}`` for a live session, or None."""
+        raise NotImplementedError()
+
+    def _write_rows(self, store_id, expires_at, changed, deleted):
+        raise NotImplementedError()
+
+    def _delete_session(self, store_id):
+        raise NotImplementedError()
+
+    def _delete_expired_sessions(self, now=None):
+        raise NotImplementedError()
+
+    def _retrieve_session_data(self, store_id):
+        rows = self._load_rows(store_id, time.time())
+        self._loaded.rows = (store_id, rows or {})
+        if rows is None:
+            return None
+        return {key: self._decoder.decode(value) for key, value in rows.items()}
+
+    def open_session(self, app, request):
+        started = time.perf_counter()
+        self._loaded.rows = None
+        session = super().open_session(app, request)
+        loaded = self._loaded.rows
+        # Baseline for the dirty-key comparison; a fresh session has none
+        session.stored_rows = loaded[1] if loaded and loaded[0] == self._get_store_id(session.sid) else {}
+        session.touched_at = time.time() if session.stored_rows else 0.0
+        elapsed = time.perf_counter() - started
+        session.timings = {'load': elapsed}
+        self._count(loads=1, load_seconds_total=elapsed)
+        return session
+
+    def should_set_storage(self, app, session):
+        # _upsert_session decides per key what actually needs writing
+        return True
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        started = time.perf_counter()
+        stored_rows = getattr(session, 'stored_rows', {})
+        encoded = {key: self._encoder.encode(value) for key, value in session.items()}
+        changed = {key: value for key, value in encoded.items() if stored_rows.get(key) != value}
+        deleted = [key for key in stored_rows if key not in encoded]
+        now = time.time()
+        if changed or deleted or now - getattr(session, 'touched_at', 0.0) > SESSION_TOUCH_SECONDS:
+            self._write_rows(store_id, now + session_lifetime.total_seconds(), changed, deleted)
+            session.stored_rows = encoded
+            session.touched_at = now
+        if now >= self._next_prune:
+            self._next_prune = now + SESSION_PRUNE_SECONDS
+            self._delete_expired_sessions(now)
+
+        elapsed = time.perf_counter() - started
+        size = sum(len(value) for value in encoded.values())
+        session.timings = dict(getattr(session, 'timings', {}), save=elapsed, size=size, written=len(changed))
+        self._count(
+            saves=1, keys_written=len(changed), keys_deleted=len(deleted),
+            bytes_written=sum(len(value) for value in changed.values()), save_seconds_total=elapsed,
+        )
+        with self._stats_lock:
+            self._stats['size_bytes_max'] = max(self._stats['size_bytes_max'], size)
+
+    def save_session(self, app, session, response):
+        super().save_session(app, session, response)
+        timings = getattr(session, 'timings', None)
+        if timings is None:
+            return
+        metrics = [f"session-load;dur={timings.get('load', 0.0) * 1000:.2f}"]
+        if 'save' in timings:
+            metrics.append(
+                f'session-save;dur={timings["save"] * 1000:.2f};'
+                f'desc="{timings["size"]} bytes, {timings["written"]} keys written"'
+            )
+        response.headers.add('Server-Timing', ', '.join(metrics))
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats)
+
+
+class MemorySessionInterface(LeanSessionInterface):
+    """LeanSessionInterface keeping sessions in this process (single worker only)."""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._sessions = {}  # store_id -> [expires_at, {key: encoded_value}]
+        self._lock = threading.Lock()
+
+    def _load_rows(self, store_id, now):
+        with self._lock:
+            entry = self._sessions.get(store_id)
+            if entry is None or entry[0] <= now:
+                return None
+            return dict(entry[1])
+
+    def _write_rows(self, store_id, expires_at, changed, deleted):
+        with self._lock:
+            entry = self._sessions.setdefault(store_id, [expires_at, {}])
+            entry[0] = expires_at
+            entry[1].update(changed)
+            for key in deleted:
+                entry[1].pop(key, None)
+
+    def _delete_session(self, store_id):
+        with self._lock:
+            self._sessions.pop(store_id, None)
+
+    def _delete_expired_sessions(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            for store_id in [store_id for store_id, entry in self._sessions.items() if entry[0] <= now]:
+                del self._sessions[store_id]
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats['sessions'] = len(self._sessions)
+        return stats
+
+
+class SqliteSessionInterface(LeanSessionInterface):
+    """LeanSessionInterface backed by a WAL sqlite file shared by worker processes."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS sessions (store_id TEXT PRIMARY KEY, expires_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS sessions_expiry ON sessions (expires_at)",
+        "CREATE TABLE IF NOT EXISTS session_values ("
+        " store_id TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+        " PRIMARY KEY (store_id, key)) WITHOUT ROWID",
+    )
+
+    def __init__(self, app, path):
+        super().__init__(app)
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        return _thread_sqlite_connection(self._local, self.path, self.SCHEMA)
+
+    def _load_rows(self, store_id, now):
+        conn = self._connection()
+        found = conn.execute(
+            "SELECT 1 FROM sessions WHERE store_id = ? AND expires_at > ?", (store_id, now),
+        ).fetchone()
+        if found is None:
+            return None
+        return dict(conn.execute("SELECT key, value FROM session_values WHERE store_id = ?", (store_id,)))
+
+    def _write_rows(self, store_id, expires_at, changed, deleted):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO sessions (store_id, expires_at) VALUES (?, ?)"
+                " ON CONFLICT(store_id) DO UPDATE SET expires_at = excluded.expires_at",
+                (store_id, expires_at),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO session_values (store_id, key, value) VALUES (?, ?, ?)",
+                [(store_id, key, value) for key, value in changed.items()],
+            )
+            conn.executemany(
+                "DELETE FROM session_values WHERE store_id = ? AND key = ?",
+                [(store_id, key) for key in deleted],
+            )
+
+    def _delete_session(self, store_id):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM session_values WHERE store_id = ?", (store_id,))
+            conn.execute("DELETE FROM sessions WHERE store_id = ?", (store_id,))
+
+    def _delete_expired_sessions(self, now=None):
+        now = time.time() if now is None else now
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "DELETE FROM session_values WHERE store_id IN (SELECT store_id FROM sessions WHERE expires_at <= ?)",
+                (now,),
+            )
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+    def stats(self):
+        stats = super().stats()
+        stats['sessions'] = self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return stats
+
+
+if SESSION_BACKEND == 'filesystem':
+    app.config['SESSION_TYPE'] = 'filesystem'
+    app.config['SESSION_FILE_DIR'] = os.path.join(os.getcwd(), 'flask_session_data')
+    Session(app)
+elif SESSION_BACKEND == 'sqlite':
+    app.session_interface = SqliteSessionInterface(app, SESSION_STORE_PATH)
+elif SESSION_BACKEND == 'memory':
+    app.session_interface = MemorySessionInterface(app)
+else:
+    raise RuntimeError(f"Unknown SESSION_BACKEND: {SESSION_BACKEND}")
+
+# Background work priorities: lower runs first
+PRIORITY_INTERACTIVE = 0  # the user is waiting on it right now (deck sentences, current card)
+PRIORITY_STORY = 1
+PRIORITY_SPECULATIVE = 2  # nice-to-have prefetch that can be shed under load
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "16"))
+# Workers that only pick up interactive tasks, so slow story calls cannot starve card flips
+BACKGROUND_INTERACTIVE_RESERVED_WORKERS = int(os.getenv("BACKGROUND_INTERACTIVE_RESERVED_WORKERS", "4"))
+MAX_BACKGROUND_QUEUE = int(os.getenv("MAX_BACKGROUND_QUEUE", "500"))
+# How many upcoming cards to prepare while the user is on the current one
+ANKI_LOOKAHEAD_CARDS = int(os.getenv("ANKI_LOOKAHEAD_CARDS", "2"))
+# Also render image hints ahead of time; costs an image generation per card
+ANKI_LOOKAHEAD_IMAGE_HINTS = os.getenv("ANKI_LOOKAHEAD_IMAGE_HINTS", "0") == "1"
+
+
+class BackgroundExecutor:
+    """Bounded worker pool that runs background tasks by priority class.
+
+    Tasks wait in a heap ordered by (priority, submit order). When the queue
+    is full a new task either displaces the least important queued task, if
+    it outranks it, or is rejected; the displaced or rejected task's
+    ``on_reject`` callback runs so its job can be marked as failed instead of
+    hanging in 'in_progress'. Tasks submitted with a ``tag`` (a string or a
+    tuple of them) can be dropped from the queue with ``cancel(tag)``, or
+    moved up with ``promote(tag, priority)``, while they are still waiting.
+    """
+
+    def __init__(self, max_workers, max_queue, reserved_interactive_workers=0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_background_running = max(1, max_workers - reserved_interactive_workers)
+        self._queue = []  # heap of (priority, seq, enqueued_at, fn, args, kwargs, on_reject, tags)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers = []
+        self._running = {}  # priority -> running task count
+        self._idle_workers = 0
+        self._stats = {
+            'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'shed': 0, 'cancelled': 0,
+            'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0,
+        }
+
+    def _background_running(self):
+        return sum(count for priority, count in self._running.items() if priority != PRIORITY_INTERACTIVE)
+
+    def _runnable(self):
+        if not self._queue:
+            return False
+        return self._queue[0][0] == PRIORITY_INTERACTIVE or self._background_running() < self.max_background_running
+
+    def submit(self, fn, *args, priority=PRIORITY_SPECULATIVE, on_reject=None, tag=None, **kwargs):
+        """Queue ``fn(*args, **kwargs)``; returns False if it was rejected."""
+        accepted = True
+        dropped_callback = None
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                lowest = max(self._queue)
+                if lowest[0] <= priority:
+                    accepted = False
+                    dropped_callback = on_reject
+                    self._stats['rejected'] += 1
+                else:
+                    self._queue.remove(lowest)
+                    heapq.heapify(self._queue)
+                    dropped_callback = lowest[6]
+                    self._stats['shed'] += 1
+            if accepted:
+                tags = tag if isinstance(tag, tuple) else (tag,)
+                heapq.heappush(self._queue, (priority, next(self._seq), time.monotonic(), fn, args, kwargs, on_reject, tags))
+                self._stats['submitted'] += 1
+                self._spawn_worker_if_needed()
+                self._cond.notify()
+        if dropped_callback is not None:
+            try:
+                dropped_callback()
+            except Exception:
+                print(traceback.format_exc())
+        return accepted
+
+    def _spawn_worker_if_needed(self):
+        # Idle workers already notified may not have woken yet, so compare
+        # against the backlog rather than spawning only when none is idle
+        if len(self._queue) > self._idle_workers and len(self._workers) < self.max_workers:
+            worker = threading.Thread(target=self._work, name=f"background-{len(self._workers)}", daemon=True)
+            self._workers.append(worker)
+            worker.start()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._idle_workers += 1
+                while not self._runnable():
+                    self._cond.wait()
+                self._idle_workers -= 1
+                priority, _, enqueued_at, fn, args, kwargs, _, _ = heapq.heappop(self._queue)
+                waited = time.monotonic() - enqueued_at
+                METRICS.observe('background_queue_wait_seconds', {'priority': str(priority)}, waited)
+                self._stats['wait_seconds_total'] += waited
+                self._stats['wait_seconds_max'] = max(self._stats['wait_seconds_max'], waited)
+                self._running[priority] = self._running.get(priority, 0) + 1
+
+            outcome = 'completed'
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                outcome = 'failed'
+                print(traceback.format_exc())
+            finally:
+                with self._cond:
+                    self._running[priority] -= 1
+                    self._stats[outcome] += 1
+                    # A freed slot may unblock a task held back by the reservation
+                    self._cond.notify_all()
+
+    def cancel(self, tag):
+        """Drop queued tasks submitted with ``tag``; running ones are left to finish."""
+        with self._cond:
+            kept = [task for task in self._queue if tag not in task[7]]
+            cancelled = len(self._queue) - len(kept)
+            if cancelled:
+                heapq.heapify(kept)
+                self._queue = kept
+                self._stats['cancelled'] += cancelled
+        return cancelled
+
+    def promote(self, tag, priority):
+        """Raise queued tasks submitted with ``tag`` to ``priority``; returns how many moved."""
+        with self._cond:
+            promoted = 0
+            for index, task in enumerate(self._queue):
+                if tag in task[7] and task[0] > priority:
+                    self._queue[index] = (priority,) + task[1:]
+                    promoted += 1
+            if promoted:
+                heapq.heapify(self._queue)
+                self._spawn_worker_if_needed()
+                # Workers held back by the background reservation may now run it
+                self._cond.notify_all()
+        return promoted
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats['workers'] = len(self._workers)
+            stats['running'] = sum(self._running.values())
+            stats['queue_depth'] = len(self._queue)
+            stats['queue_depth_by_priority'] = {}
+            for task in self._queue:
+                stats['queue_depth_by_priority'][task[0]] = stats['queue_depth_by_priority'].get(task[0], 0) + 1
+        started = stats['completed'] + stats['failed'] + stats['running']
+        stats['wait_seconds_avg'] = stats['wait_seconds_total'] / started if started else 0.0
+        return stats
+
+
+BACKGROUND_EXECUTOR = BackgroundExecutor(
+    BACKGROUND_WORKERS,
+    MAX_BACKGROUND_QUEUE,
+    reserved_interactive_workers=BACKGROUND_INTERACTIVE_RESERVED_WORKERS,
+)
+
+class JobRegistry:
+    """Thread-safe store of background job records with TTL expiry.
+
+    Every job lives for the same ``ttl`` from its last ``put``, so insertion
+    order is expiry order: an OrderedDict doubles as the eviction queue and
+    pruning only ever pops expired entries off the front (amortized O(1)).
+    A per-session index makes clearing a session O(jobs in that session).
+
+    Each change bumps the job's version and wakes threads blocked in
+    ``wait`` on that key, so readers never need to sleep-poll.
+    """
+
+    def __init__(self, ttl, max_jobs):
+        self.ttl_seconds = ttl.total_seconds()
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()  # key -> [expires_at, version, session_key, job]
+        self._by_session = {}  # session_key -> set(keys)
+        self._waiters = {}  # key -> [threading.Event]
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _discard(self, key):
+        entry = self._jobs.pop(key, None)
+        if entry is None:
+            return None
+        keys = self._by_session.get(entry[2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_session[entry[2]]
+        self._wake(key)
+        return entry
+
+    def _wake(self, key):
+        for event in self._waiters.pop(key, ()):
+            event.set()
+
+    def _prune(self, now):
+        while self._jobs:
+            key, entry = next(iter(self._jobs.items()))
+            if entry[0] > now and len(self._jobs) <= self.max_jobs:
+                break
+            self._discard(key)
+
+    def _live_entry(self, key, now):
+        entry = self._jobs.get(key)
+        if entry is not None and entry[0] <= now:
+            self._discard(key)
+            return None
+        return entry
+
+    def prune(self):
+        with self._lock:
+            self._prune(time.monotonic())
+
+    def put(self, key, job, session_key):
+        """Store ``job`` under ``key``, replacing any previous record and restarting its TTL."""
+        with self._lock:
+            # Read the clock under the lock so insertion order stays expiry order
+            now = time.monotonic()
+            self._discard(key)
+            self._jobs[key] = [now + self.ttl_seconds, next(self._versions), session_key, dict(job)]
+            self._by_session.setdefault(session_key, set()).add(key)
+            self._prune(now)
+
+    def update(self, key, fields, match=None):
+        """Merge ``fields`` into an existing job; False if it is gone or ``match`` does not hold."""
+        with self._lock:
+            entry = self._live_entry(key, time.monotonic())
+            if entry is None:
+                return False
+            if match and any(entry[3].get(name) != value for name, value in match.items()):
+                return False
+            entry[3].update(fields)
+            entry[1] = next(self._versions)
+            self._wake(key)
+            return True
+
+    def get_with_version(self, key):
+        """Return ``(version, copy_of_job)``, or ``(None, None)`` if there is no live job."""
+        with self._lock:
+            entry = self._live_entry(key, time.monotonic())
+            if entry is None:
+                return None, None
+            return entry[1], dict(entry[3])
+
+    def get(self, key, default=None):
+        job = self.get_with_version(key)[1]
+        return default if job is None else job
+
+    def __contains__(self, key):
+        return self.get_with_version(key)[1] is not None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._jobs)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._discard(key)
+        return default if entry is None else entry[3]
+
+    def clear_session(self, session_key):
+        with self._lock:
+            for key in list(self._by_session.get(session_key, ())):
+                self._discard(key)
+
+    def wait(self, key, version, timeout):
+        """Block until the job under ``key`` no longer has ``version``; returns ``get_with_version``."""
+        with self._lock:
+            entry = self._live_entry(key, time.monotonic())
+            if (entry[1] if entry else None) != version:
+                return (entry[1], dict(entry[3])) if entry else (None, None)
+            event = threading.Event()
+            self._waiters.setdefault(key, []).append(event)
+        if not event.wait(timeout):
+            with self._lock:
+                waiters = self._waiters.get(key)
+                if waiters and event in waiters:
+                    waiters.remove(event)
+                    if not waiters:
+                        del self._waiters[key]
+        return self.get_with_version(key)
+
+
+class SqliteJobRegistry:
+    """JobRegistry backed by a shared sqlite (WAL) file instead of process memory.
+
+    Every web worker on the host sees the same jobs, so a poll can land on
+    any process. Expiry uses wall-clock time because monotonic clocks are
+    per process. Waiters in the writing process are woken directly; waiters
+    in other processes notice a change within JOB_STORE_POLL_SECONDS.
+    """
+
+    def __init__(self, path, namespace, ttl, max_jobs):
+        self.path = path
+        self.namespace = namespace
+        self.ttl_seconds = ttl.total_seconds()
+        self.max_jobs = max_jobs
+        self._local = threading.local()
+        self._changed = threading.Condition()
+        self._puts = itertools.count(1)
+
+    def _connection(self):
+        return _thread_sqlite_connection(self._local, self.path, (
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, session_key TEXT NOT NULL, "
+            "version INTEGER NOT NULL, expires_at REAL NOT NULL, job TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key))",
+            "CREATE INDEX IF NOT EXISTS jobs_session ON jobs (namespace, session_key)",
+            "CREATE INDEX IF NOT EXISTS jobs_expiry ON jobs (namespace, expires_at)",
+        ))
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def _prune(self, conn, now, trim):
+        conn.execute("DELETE FROM jobs WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+        if trim:
+            conn.execute(
+                "DELETE FROM jobs WHERE namespace = ? AND key IN ("
+                "SELECT key FROM jobs WHERE namespace = ? ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.namespace, self.namespace, self.max_jobs),
+            )
+
+    def prune(self):
+        conn = self._connection()
+        with conn:
+            self._prune(conn, time.time(), trim=True)
+
+    def put(self, key, job, session_key):
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            # Versions only need to change on every write; nanosecond wall time
+            # keeps them unique even if a key is popped and put again.
+            conn.execute(
+                "INSERT INTO jobs (namespace, key, session_key, version, expires_at, job) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET session_key = excluded.session_key, "
+                "version = MAX(jobs.version + 1, excluded.version), expires_at = excluded.expires_at, job = excluded.job",
+                (self.namespace, key, session_key, time.time_ns(), now + self.ttl_seconds, json.dumps(job)),
+            )
+            # Capacity trimming needs a sort, so only do it every so often
+            self._prune(conn, now, trim=next(self._puts) % 50 == 0)
+        self._notify()
+
+    def update(self, key, fields, match=None):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT job FROM jobs WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (self.namespace, key, time.time()),
+            ).fetchone()
+            if row is None:
+                return False
+            job = json.loads(row[0])
+            if match and any(job.get(name) != value for name, value in match.items()):
+                return False
+            job.update(fields)
+            conn.execute(
+                "UPDATE jobs SET job = ?, version = MAX(version + 1, ?) WHERE namespace = ? AND key = ?",
+                (json.dumps(job), time.time_ns(), self.namespace, key),
+            )
+        self._notify()
+        return True
+
+    def get_with_version(self, key):
+        row = self._connection().execute(
+            "SELECT version, job FROM jobs WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (self.namespace, key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None, None
+        return row[0], json.loads(row[1])
+
+    def get(self, key, default=None):
+        job = self.get_with_version(key)[1]
+        return default if job is None else job
+
+    def __contains__(self, key):
+        return self.get_with_version(key)[1] is not None
+
+    def __len__(self):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM jobs WHERE namespace = ? AND expires_at > ?", (self.namespace, time.time())
+        ).fetchone()[0]
+
+    def pop(self, key, default=None):
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT job, expires_at FROM jobs WHERE namespace = ? AND key = ?", (self.namespace, key)
+            ).fetchone()
+            conn.execute("DELETE FROM jobs WHERE namespace = ? AND key = ?", (self.namespace, key))
+        self._notify()
+        if row is None or row[1] <= time.time():
+            return default
+        return json.loads(row[0])
+
+    def clear_session(self, session_key):
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM jobs WHERE namespace = ? AND session_key = ?", (self.namespace, session_key))
+        self._notify()
+
+    def wait(self, key, version, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self.get_with_version(key)
+            remaining = deadline - time.monotonic()
+            if current[0] != version or remaining <= 0:
+                return current
+            with self._changed:
+                self._changed.wait(min(remaining, JOB_STORE_POLL_SECONDS))
+
+
+def make_job_registry(namespace):
+    """Build the job store for ``namespace`` using the JOB_STORE_BACKEND setting."""
+    if JOB_STORE_BACKEND == 'sqlite':
+        return SqliteJobRegistry(JOB_STORE_PATH, namespace, BACKGROUND_JOB_TTL, MAX_BACKGROUND_JOBS)
+    if JOB_STORE_BACKEND != 'memory':
+        raise RuntimeError(f"Unknown JOB_STORE_BACKEND: {JOB_STORE_BACKEND}")
+    return JobRegistry(BACKGROUND_JOB_TTL, MAX_BACKGROUND_JOBS)
+
 
 # ------------------------------------------------------------------------------
 # 1) constants and helper
@@ -82,9 +1380,59 @@ anki_translation_jobs = {}
 DEFAULT_WORTLIST_FILE = "A1Wortlist.csv"
 MAX_BACKGROUND_JOBS = 200
 BACKGROUND_JOB_TTL = timedelta(hours=1)
+# 'memory' keeps jobs in this process; 'sqlite' shares them across worker processes
+JOB_STORE_BACKEND = os.getenv("JOB_STORE_BACKEND", "memory")
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH") or os.path.join(os.getcwd(), 'job_store.sqlite3')
+JOB_STORE_POLL_SECONDS = 0.1
 GENERATED_IMAGE_TTL = timedelta(hours=6)
 MAX_GENERATED_IMAGES = 200
+MAX_GENERATED_IMAGE_BYTES = 100 * 1024 * 1024
+IMAGE_JANITOR_INTERVAL_SECONDS = 300
+# Downscaled copies rendered at save time so phones can fetch fewer bytes (needs Pillow)
+IMAGE_HINT_VARIANT_WIDTHS = (256, 512)
+GENERATED_IMAGE_CACHE_SECONDS = 365 * 24 * 60 * 60
+IMAGE_HINT_TIMEOUT_SECONDS = 120
+IMAGE_HINT_PARAMS = {
+    "model": "gpt-image-2",
+    # gpt-image-2 supports arbitrary sizes, but 512x512 is below the
+    # current minimum pixel budget in production. Use the smallest
+    # standard size from the current spec.
+    "size": "1024x1024",
+    "quality": "low",
+    "output_format": "webp",
+}
 GENERATED_IMAGES_DIR = os.path.join(os.getcwd(), 'generated_images')
+STORY_STREAMING = os.getenv("STORY_STREAMING", "1") != "0"
+STORY_STREAM_HEARTBEAT_SECONDS = 15
+STORY_STREAM_MAX_SECONDS = 600
+# Minimum gap between partial-story writes to the job store while streaming
+STORY_STREAM_PUBLISH_SECONDS = 0.1
+# Estimated tokens of recent turns resent each turn; older turns are summarized
+CONVERSATION_CONTEXT_TOKENS = int(os.getenv("CONVERSATION_CONTEXT_TOKENS", "1500"))
+# Chain turns via previous_response_id so only the new message is uploaded
+CONVERSATION_CHAIN_RESPONSES = os.getenv("CONVERSATION_CHAIN_RESPONSES", "0") == "1"
+# Turns that must fall out of the window before they are folded into the summary
+CONVERSATION_SUMMARY_BATCH_TURNS = 6
+# Render the reply page at once and stream the assistant's answer over SSE
+CONVERSATION_STREAMING = os.getenv("CONVERSATION_STREAMING", "1") != "0"
+CONVERSATION_REPLY_TIMEOUT_SECONDS = 120
+TRANSLATION_CACHE_PATH = os.path.join(os.getcwd(), 'translation_cache.sqlite3')
+WORTLIST_STORE_PATH = os.path.join(os.getcwd(), 'wortlist_store.sqlite3')
+# Pre-generated example sentences per word and level (see `flask build-sentence-bank`)
+SENTENCE_BANK_PATH = os.path.join(os.getcwd(), 'sentence_bank.sqlite3')
+SENTENCE_BANK_ENABLED = os.getenv("SENTENCE_BANK", "1") != "0"
+SENTENCE_BANK_VARIANTS = 3
+# A variant is retired (and refilled) after this many decks have used it
+SENTENCE_BANK_MAX_SERVES = 8
+SENTENCE_BANK_BATCH_WORDS = 10
+# Bump when the bank prompt changes; older variants are then ignored and refilled
+SENTENCE_BANK_PROMPT_VERSION = "bank-v1"
+TRANSLATION_CACHE_TTL = timedelta(days=30)
+MAX_TRANSLATION_CACHE_ENTRIES = 50000
+MAX_TRANSLATION_CACHE_MEMORY_ENTRIES = 2048
+# Bump these whenever the matching prompt changes so stale answers are not reused
+SENTENCE_TRANSLATION_PROMPT_VERSION = "sentence-v1"
+WORD_TRANSLATION_PROMPT_VERSION = "word-v1"
 FREQUENCY_OPTIONS = {
     "": ("T", "W"),
     "T": ("T", "W"),
@@ -101,6 +1449,28 @@ FREQUENCY_DISPLAY = {
     "B": "Burned",
 }
 
+# Store background results. JOB_STORE_BACKEND=sqlite shares them between worker
+# processes on one host, so polls do not need sticky routing.
+story_results = make_job_registry('story')  # Story by session ID
+# Background sentences generation for Anki (Responses API)
+anki_sentences_jobs = make_job_registry('anki_sentences')  # { session_id: {status: 'in_progress'|'done'|'error', response: str, error: str, job_id: str} }
+ANKI_SENTENCES_LONG_POLL_SECONDS = 25
+ANKI_SENTENCES_RETRY_AFTER_SECONDS = 1
+
+# Background prefetch state for Anki translations
+# Keyed by f"{session_id}:{card_number}" and stores statuses/results
+anki_translation_jobs = make_job_registry('anki_translation')
+# Keyed by session id; running summaries of older conversation turns
+conversation_summary_jobs = make_job_registry('conversation_summary')
+# Keyed by session id; the assistant reply being streamed for the latest turn
+conversation_reply_jobs = make_job_registry('conversation_reply')
+# Keyed by session id; spell-check of the user's text and translation of the reply for the latest turn
+conversation_review_jobs = make_job_registry('conversation_review')
+
+# Image hints being generated right now, keyed by _image_hint_key
+image_hint_inflight = {}  # { key: {'done': threading.Event, 'error': str|None} }
+image_hint_inflight_lock = threading.Lock()
+
 
 def redirect_to_home():
     # Relative redirects keep the app under /App/GermanFriendOnline/ even when
@@ -118,68 +1488,922 @@ def redirect_to_anki():
 # Assistant IDs no longer used after migration to Responses API
 
 
+def _thread_sqlite_connection(local, path, schema):
+    """Return this thread's WAL-mode connection to ``path``, creating ``schema`` on first use."""
+    conn = getattr(local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in schema:
+            conn.execute(statement)
+        conn.commit()
+        local.conn = conn
+    return conn
+
+
+class TranslationCache:
+    """Content-addressed translation cache shared across sessions and processes.
+
+    Entries live in sqlite so every worker process and restart sees them; a
+    small in-process LRU sits in front so repeat lookups skip the database.
+    Keys hash the NFC-normalized input together with the model and prompt
+    version, so changing either one never serves an outdated translation.
+    """
+
+    def __init__(self, path, ttl, max_entries, max_memory_entries):
+        self.path = path
+        self.ttl_seconds = ttl.total_seconds()
+        self.max_entries = max_entries
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes_since_evict = 0
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+    @staticmethod
+    def make_key(prompt_version, model, text):
+        normalized = _normalize_text(text)
+        return hashlib.sha256(f"{prompt_version}\0{model}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def _connection(self):
+        return _thread_sqlite_connection(self._local, self.path, (
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "created_at REAL NOT NULL, last_used REAL NOT NULL)",
+            "CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)",
+        ))
+
+    def _remember(self, key, created_at, value):
+        with self._lock:
+            self._memory[key] = (created_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get(self, prompt_version, model, text):
+        key = self.make_key(prompt_version, model, text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return entry[1]
+            if entry:
+                self._memory.pop(key, None)
+
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, created_at FROM translations WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE translations SET last_used = ? WHERE key = ?", (now, key))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"[translation_cache] read failed: {e}")
+            row = None
+
+        if not row:
+            self._count('misses')
+            return None
+        self._count('disk_hits')
+        self._remember(key, row[1], row[0])
+        return row[0]
+
+    def set(self, prompt_version, model, text, value):
+        key = self.make_key(prompt_version, model, text)
+        now = time.time()
+        self._remember(key, now, value)
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO translations (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            conn.commit()
+            self._count('writes')
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 100:
+                self._writes_since_evict = 0
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            print(f"[translation_cache] write failed: {e}")
+
+    def _evict(self, conn, now):
+        removed = conn.execute(
+            "DELETE FROM translations WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        removed += conn.execute(
+            "DELETE FROM translations WHERE key IN ("
+            "SELECT key FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        conn.commit()
+        if removed:
+            self._count('evictions', removed)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+
+TRANSLATION_CACHE = TranslationCache(
+    TRANSLATION_CACHE_PATH,
+    TRANSLATION_CACHE_TTL,
+    MAX_TRANSLATION_CACHE_ENTRIES,
+    MAX_TRANSLATION_CACHE_MEMORY_ENTRIES,
+)
+
+
+class SentenceBank:
+    """Pre-generated example sentences with translations, keyed by level and word.
+
+    Each word keeps a few variants; ``take`` hands out the least-served one
+    so repeated decks rotate through them, and retires variants after
+    SENTENCE_BANK_MAX_SERVES uses so refills keep the bank fresh.
+    """
+
+    def __init__(self, path, prompt_version, max_serves):
+        self.path = path
+        self.prompt_version = prompt_version
+        self.max_serves = max_serves
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._refilling = set()  # (level, word key) with a refill queued or running
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'retired': 0}
+
+    @staticmethod
+    def word_key(word):
+        return _normalize_text(word).lower()
+
+    def _connection(self):
+        return _thread_sqlite_connection(self._local, self.path, (
+            "CREATE TABLE IF NOT EXISTS sentences ("
+            "id INTEGER PRIMARY KEY, level TEXT NOT NULL, word_key TEXT NOT NULL, "
+            "prompt_version TEXT NOT NULL, sentence TEXT NOT NULL, sentence_translation TEXT NOT NULL, "
+            "word_translation TEXT NOT NULL, served INTEGER NOT NULL DEFAULT 0, "
+            "last_served REAL NOT NULL DEFAULT 0, created_at REAL NOT NULL, "
+            "UNIQUE (level, word_key, prompt_version, sentence))",
+            "CREATE INDEX IF NOT EXISTS sentences_rotation "
+            "ON sentences (level, word_key, prompt_version, served, last_served)",
+        ))
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def take(self, level, words):
+        """Pick one variant per word; returns ``{word: row dict}`` for the words the bank covers."""
+        now = time.time()
+        taken = {}
+        try:
+            conn = self._connection()
+            with conn:
+                for word in words:
+                    row = conn.execute(
+                        "SELECT id, sentence, sentence_translation, word_translation, served FROM sentences "
+                        "WHERE level = ? AND word_key = ? AND prompt_version = ? "
+                        "ORDER BY served, last_served LIMIT 1",
+                        (level, self.word_key(word), self.prompt_version),
+                    ).fetchone()
+                    if not row:
+                        continue
+                    row_id, sentence, sentence_translation, word_translation, served = row
+                    if served + 1 >= self.max_serves:
+                        conn.execute("DELETE FROM sentences WHERE id = ?", (row_id,))
+                        self._count('retired')
+                    else:
+                        conn.execute(
+                            "UPDATE sentences SET served = served + 1, last_served = ? WHERE id = ?", (now, row_id),
+                        )
+                    taken[word] = {
+                        'sentence': sentence,
+                        'sentence_translation': sentence_translation,
+                        'word_translation': word_translation,
+                    }
+        except sqlite3.Error as e:
+            print(f"[sentence_bank] read failed: {e}")
+            taken = {}
+        self._count('hits', len(taken))
+        self._count('misses', len(words) - len(taken))
+        return taken
+
+    def add(self, level, word, word_translation, variants):
+        """Store ``variants`` (``(sentence, sentence_translation)`` pairs) for ``word``."""
+        now = time.time()
+        try:
+            conn = self._connection()
+            with conn:
+                written = conn.executemany(
+                    "INSERT OR IGNORE INTO sentences (level, word_key, prompt_version, sentence, "
+                    "sentence_translation, word_translation, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (level, self.word_key(word), self.prompt_version, sentence, sentence_translation,
+                         word_translation, now)
+                        for sentence, sentence_translation in variants
+                    ],
+                ).rowcount
+            self._count('writes', written)
+        except sqlite3.Error as e:
+            print(f"[sentence_bank] write failed: {e}")
+
+    def short_words(self, level, words, target):
+        """The words with fewer than ``target`` current variants."""
+        keys = {self.word_key(word): word for word in words}
+        counts = {}
+        conn = self._connection()
+        for start in range(0, len(keys), 500):
+            chunk = list(keys)[start:start + 500]
+            counts.update(conn.execute(
+                f"SELECT word_key, COUNT(*) FROM sentences WHERE level = ? AND prompt_version = ? "
+                f"AND word_key IN ({', '.join('?' * len(chunk))}) GROUP BY word_key",
+                (level, self.prompt_version, *chunk),
+            ).fetchall())
+        return [word for key, word in keys.items() if counts.get(key, 0) < target]
+
+    def claim_refill(self, level, words):
+        """Mark ``words`` as being refilled; returns those nobody else is refilling."""
+        with self._lock:
+            claimed = [word for word in words if (level, self.word_key(word)) not in self._refilling]
+            self._refilling.update((level, self.word_key(word)) for word in claimed)
+        return claimed
+
+    def release_refill(self, level, words):
+        with self._lock:
+            self._refilling.difference_update((level, self.word_key(word)) for word in words)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats, refilling=len(self._refilling))
+        try:
+            stats['sentences'] = self._connection().execute(
+                "SELECT COUNT(*) FROM sentences WHERE prompt_version = ?", (self.prompt_version,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            stats['sentences'] = 0
+        return stats
+
+
+SENTENCE_BANK = SentenceBank(SENTENCE_BANK_PATH, SENTENCE_BANK_PROMPT_VERSION, SENTENCE_BANK_MAX_SERVES)
+
+
 def _ensure_generated_images_dir():
     os.makedirs(GENERATED_IMAGES_DIR, exist_ok=True)
 
 
-def _prune_generated_images():
-    _ensure_generated_images_dir()
-    now = time.time()
-    entries = []
-    for name in os.listdir(GENERATED_IMAGES_DIR):
-        path = os.path.join(GENERATED_IMAGES_DIR, name)
-        if not os.path.isfile(path):
-            continue
+# {cache key}.{content digest}[.{width}].webp -- the digest makes every URL immutable
+GENERATED_IMAGE_NAME = re.compile(r'^([0-9a-f]{32})\.([0-9a-f]{16})(?:\.(\d+))?\.webp$')
+
+
+def _generated_image_name(key, digest, width=None):
+    suffix = f".{width}" if width else ""
+    return f"{key}.{digest}{suffix}.webp"
+
+
+class GeneratedImageIndex:
+    """In-memory index of the image hints in GENERATED_IMAGES_DIR.
+
+    Each cache key (see _image_hint_key) maps to one rendered image: its
+    content digest, the files on disk (full size plus downscaled variants)
+    and when it was last used. Entries are kept in least-recently-used
+    order, so enforcing GENERATED_IMAGE_TTL and the count/byte caps only
+    pops from the front. The directory is scanned once at start-up and then
+    by the periodic janitor (to pick up files written by other worker
+    processes); request paths only consult the index.
+    """
+
+    def __init__(self, directory, ttl, max_images, max_bytes):
+        self.directory = directory
+        self.ttl_seconds = ttl.total_seconds()
+        self.max_images = max_images
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> {'digest': str, 'files': {width|None: size}, 'last_used': float}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._janitor = None
+
+    def _set(self, key, entry):
+        self._drop(key)
+        self._entries[key] = entry
+        self._total_bytes += sum(entry['files'].values())
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._total_bytes -= sum(entry['files'].values())
+        return entry
+
+    def _paths(self, key, entry):
+        return [os.path.join(self.directory, _generated_image_name(key, entry['digest'], width)) for width in entry['files']]
+
+    def rescan(self):
+        """Rebuild the index from the directory (start-up and janitor only)."""
+        os.makedirs(self.directory, exist_ok=True)
+        found = {}  # key -> {digest: entry}
+        for dir_entry in os.scandir(self.directory):
+            if dir_entry.name.startswith('.') or not dir_entry.is_file():
+                continue
+            match = GENERATED_IMAGE_NAME.match(dir_entry.name)
+            if not match:
+                # Left over from an older naming scheme; nothing can reach it any more
+                with contextlib.suppress(OSError):
+                    os.remove(dir_entry.path)
+                continue
+            try:
+                stat = dir_entry.stat()
+            except OSError:
+                continue
+            key, digest, width = match.group(1), match.group(2), match.group(3)
+            entry = found.setdefault(key, {}).setdefault(digest, {'digest': digest, 'files': {}, 'last_used': stat.st_mtime})
+            entry['files'][int(width) if width else None] = stat.st_size
+            entry['last_used'] = max(entry['last_used'], stat.st_mtime)
+
+        # A key re-rendered by another process leaves the older digest's files
+        # behind; keep the most recently used one and delete the rest
+        current = {}
+        superseded = []
+        for key, digests in found.items():
+            newest = current[key] = max(digests.values(), key=lambda entry: entry['last_used'])
+            for entry in digests.values():
+                if entry is not newest:
+                    superseded.extend(self._paths(key, entry))
+        for path in superseded:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            for key, entry in sorted(current.items(), key=lambda item: item[1]['last_used']):
+                self._set(key, entry)
+
+    def add(self, key, digest, files):
+        """Record a freshly saved image; ``files`` maps width (None = full size) to bytes."""
+        with self._lock:
+            previous = self._drop(key)
+            self._set(key, {'digest': digest, 'files': dict(files), 'last_used': time.time()})
+        if previous and previous['digest'] != digest:
+            for path in self._paths(key, previous):
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+        self.enforce()
+
+    def get(self, key, touch=False):
+        """Return ``{width|None: filename}`` for a live image, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or now - entry['last_used'] > self.ttl_seconds:
+                return None
+            if touch:
+                entry = dict(entry, last_used=now)
+                self._set(key, entry)
+        if touch:
+            with contextlib.suppress(OSError):
+                # Persist recency for other processes and restarts
+                os.utime(os.path.join(self.directory, _generated_image_name(key, entry['digest'])))
+        return {width: _generated_image_name(key, entry['digest'], width) for width in entry['files']}
+
+    def has_file(self, name):
+        """True if ``name`` is a live image file; used by the serving path."""
+        match = GENERATED_IMAGE_NAME.match(name)
+        if not match:
+            return False
+        key, digest, width = match.group(1), match.group(2), match.group(3)
+        width = int(width) if width else None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['digest'] == digest and width in entry['files']:
+                return time.time() - entry['last_used'] <= self.ttl_seconds
+        # Possibly written by another worker since the last rescan: one stat, no listing
         try:
-            mtime = os.path.getmtime(path)
+            stat = os.stat(os.path.join(self.directory, name))
         except OSError:
-            continue
-        if now - mtime > GENERATED_IMAGE_TTL.total_seconds():
-            try:
+            return False
+        if time.time() - stat.st_mtime > self.ttl_seconds:
+            return False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['digest'] != digest:
+                entry = {'digest': digest, 'files': {}, 'last_used': stat.st_mtime}
+            entry = dict(entry, files={**entry['files'], width: stat.st_size})
+            self._set(key, entry)
+        return True
+
+    def enforce(self):
+        """Delete expired images, then least recently used ones over the caps."""
+        now = time.time()
+        doomed = []
+        with self._lock:
+            while self._entries:
+                key, entry = next(iter(self._entries.items()))
+                if (
+                    now - entry['last_used'] <= self.ttl_seconds
+                    and len(self._entries) <= self.max_images
+                    and self._total_bytes <= self.max_bytes
+                ):
+                    break
+                self._drop(key)
+                doomed.extend(self._paths(key, entry))
+        for path in doomed:
+            with contextlib.suppress(OSError):
                 os.remove(path)
-            except OSError:
-                pass
-            continue
-        entries.append((mtime, path))
 
-    if len(entries) <= MAX_GENERATED_IMAGES:
+    def stats(self):
+        with self._lock:
+            return {'images': len(self._entries), 'bytes': self._total_bytes}
+
+    def start_janitor(self, interval_seconds):
+        with self._lock:
+            if self._janitor is not None:
+                return
+            self._janitor = threading.Thread(
+                target=self._run_janitor, args=(interval_seconds,), name='image-janitor', daemon=True,
+            )
+        self.rescan()
+        self._janitor.start()
+
+    def _run_janitor(self, interval_seconds):
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                self.rescan()
+                self.enforce()
+            except Exception:
+                print(traceback.format_exc())
+
+
+GENERATED_IMAGES = GeneratedImageIndex(
+    GENERATED_IMAGES_DIR, GENERATED_IMAGE_TTL, MAX_GENERATED_IMAGES, MAX_GENERATED_IMAGE_BYTES,
+)
+
+
+def _image_hint_key(sentence: str) -> str:
+    """Cache key for the hint image of ``sentence`` under IMAGE_HINT_PARAMS."""
+    params = json.dumps(IMAGE_HINT_PARAMS, sort_keys=True)
+    return hashlib.sha256(f"{params}\0{_normalize_text(sentence)}".encode("utf-8")).hexdigest()[:32]
+
+
+def _write_generated_image(filename: str, image_bytes: bytes):
+    # Write then rename so a concurrent request never serves a partial file
+    fd, temp_path = tempfile.mkstemp(prefix='.image-', dir=GENERATED_IMAGES_DIR)
+    try:
+        with os.fdopen(fd, 'wb') as image_file:
+            image_file.write(image_bytes)
+        os.replace(temp_path, os.path.join(GENERATED_IMAGES_DIR, filename))
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+
+def _downscaled_variants(image_bytes: bytes):
+    """Yield ``(width, webp_bytes)`` for each IMAGE_HINT_VARIANT_WIDTHS entry (needs Pillow)."""
+    if PILImage is None:
         return
+    with PILImage.open(io.BytesIO(image_bytes)) as image:
+        image.load()
+        for width in IMAGE_HINT_VARIANT_WIDTHS:
+            if width >= image.width:
+                continue
+            height = round(image.height * width / image.width)
+            buffer = io.BytesIO()
+            image.resize((width, height), PILImage.LANCZOS).save(buffer, format='WEBP', quality=80)
+            yield width, buffer.getvalue()
+
 
-    entries.sort(key=lambda item: item[0])
-    for _, path in entries[:len(entries) - MAX_GENERATED_IMAGES]:
+def _save_generated_image(image_base64: str, key: str):
+    _ensure_generated_images_dir()
+    image_bytes = base64.b64decode(image_base64, validate=True)
+    digest = hashlib.sha256(image_bytes).hexdigest()[:16]
+    files = {}
+    try:
+        # Variants first: the full-size file is what marks the image as present
+        for width, variant_bytes in _downscaled_variants(image_bytes):
+            _write_generated_image(_generated_image_name(key, digest, width), variant_bytes)
+            files[width] = len(variant_bytes)
+    except Exception:
+        print(traceback.format_exc())
+    _write_generated_image(_generated_image_name(key, digest), image_bytes)
+    files[None] = len(image_bytes)
+    GENERATED_IMAGES.add(key, digest, files)
+    return {width: _generated_image_name(key, digest, width) for width in files}
+
+
+def get_image_hint(sentence: str):
+    """Return ``{width|None: filename}`` for the hint image of ``sentence``, generating it if needed.
+
+    A previously rendered image for the same normalized sentence is reused.
+    Concurrent requests for the same sentence share one images API call.
+    """
+    GENERATED_IMAGES.start_janitor(IMAGE_JANITOR_INTERVAL_SECONDS)
+    key = _image_hint_key(sentence)
+    files = GENERATED_IMAGES.get(key, touch=True)
+    if files:
+        return files
+
+    with image_hint_inflight_lock:
+        inflight = image_hint_inflight.get(key)
+        leader = inflight is None
+        if leader:
+            inflight = image_hint_inflight[key] = {'done': threading.Event(), 'error': None}
+
+    if not leader:
+        inflight['done'].wait(IMAGE_HINT_TIMEOUT_SECONDS)
+        if inflight['error'] is not None:
+            raise RuntimeError(inflight['error'])
+        files = GENERATED_IMAGES.get(key, touch=True)
+        if files:
+            return files
+        raise RuntimeError('Image generation did not finish in time')
+
+    try:
+        response = openai_post("/images/generations", {
+            **IMAGE_HINT_PARAMS,
+            "prompt": sentence,
+            "n": 1,
+        }, timeout=IMAGE_HINT_TIMEOUT_SECONDS)
+        image_base64 = response.get("data", [{}])[0].get("b64_json")
+        if not image_base64:
+            raise RuntimeError('Image generation returned no image')
+        return _save_generated_image(image_base64, key)
+    except Exception as e:
+        inflight['error'] = str(e)
+        raise
+    finally:
+        with image_hint_inflight_lock:
+            image_hint_inflight.pop(key, None)
+        inflight['done'].set()
+
+class WortlistStore:
+    """Indexed sqlite mirror of the wortlist CSV files.
+
+    A CSV is imported once and re-imported only when its mtime or size
+    changes, so practice starts run index queries instead of scanning the
+    file. Rows keep their CSV line number, which is what the session stores
+    for each selected card; saving a deck updates just those rows and then
+    exports the CSV so it stays the compatible, hand-editable copy.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._guard = threading.Lock()
+        self._file_locks = {}  # source -> {'lock': RLock, 'depth': int, 'handle': file}
+        self._exports = {}  # source -> group-commit state, see commit()
+        self._stats = {'commits': 0, 'exports': 0, 'imports': 0}
+
+    @contextlib.contextmanager
+    def _locked(self, csv_path):
+        """Hold an exclusive lock on one wortlist across threads and processes.
+
+        Re-entrant within a thread; the cross-process part is an flock on a
+        ``.lock`` file next to the CSV where fcntl is available.
+        """
+        source = self._source(csv_path)
+        with self._guard:
+            state = self._file_locks.setdefault(source, {'lock': threading.RLock(), 'depth': 0, 'handle': None})
+        with state['lock']:
+            state['depth'] += 1
+            try:
+                if state['depth'] == 1 and fcntl is not None:
+                    state['handle'] = open(f"{source}.lock", 'a')
+                    fcntl.flock(state['handle'], fcntl.LOCK_EX)
+                yield
+            finally:
+                state['depth'] -= 1
+                if state['depth'] == 0 and state['handle'] is not None:
+                    fcntl.flock(state['handle'], fcntl.LOCK_UN)
+                    state['handle'].close()
+                    state['handle'] = None
+
+    def _count(self, name):
+        with self._guard:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._guard:
+            return dict(self._stats)
+
+    def _connection(self):
+        return _thread_sqlite_connection(self._local, self.path, (
+            "CREATE TABLE IF NOT EXISTS sources ("
+            "source TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, header TEXT)",
+            # review_date is ISO 'YYYY-MM-DD' (or '' if never reviewed).
+            # cells keeps the original row when it was not a plain 3-column row.
+            "CREATE TABLE IF NOT EXISTS words ("
+            "source TEXT NOT NULL, line INTEGER NOT NULL, word TEXT NOT NULL, "
+            "frequency TEXT NOT NULL, review_date TEXT NOT NULL, complete INTEGER NOT NULL, cells TEXT, "
+            "PRIMARY KEY (source, line))",
+            # Due words are bucketed in memory by WortlistSnapshot, so nothing queries by date
+            "DROP INDEX IF EXISTS words_review_date",
+            "CREATE INDEX IF NOT EXISTS words_frequency ON words (source, frequency)",
+        ))
+
+    @staticmethod
+    def _source(csv_path):
+        return os.path.abspath(csv_path)
+
+    def sync(self, csv_path):
+        """Import ``csv_path`` if it changed since the last import; False if it does not exist."""
         try:
-            os.remove(path)
-        except OSError:
-            pass
+            stat = os.stat(csv_path)
+        except FileNotFoundError:
+            return False
+        row = self._connection().execute(
+            "SELECT mtime_ns, size FROM sources WHERE source = ?", (self._source(csv_path),)
+        ).fetchone()
+        if row != (stat.st_mtime_ns, stat.st_size):
+            self.import_csv(csv_path)
+        return True
+
+    def import_csv(self, csv_path):
+        with self._locked(csv_path):
+            self._import_csv(csv_path)
+
+    def _import_csv(self, csv_path):
+        source = self._source(csv_path)
+        stat = os.stat(csv_path)
+        recorded = self._connection().execute(
+            "SELECT mtime_ns, size FROM sources WHERE source = ?", (source,)
+        ).fetchone()
+        if recorded == (stat.st_mtime_ns, stat.st_size):
+            # Another thread or process imported it while we waited for the lock
+            return
+        with open(csv_path, 'r', newline='') as file:
+            rows = list(csv.reader(file))
+
+        records = []
+        for line, cells in enumerate(rows[1:], start=1):
+            word, frequency, review_date = (cells + ['', '', ''])[:3]
+            records.append((
+                source, line, word, frequency, review_date,
+                len(cells) >= 3, None if len(cells) == 3 else json.dumps(cells),
+            ))
+
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM words WHERE source = ?", (source,))
+            conn.executemany("INSERT INTO words VALUES (?, ?, ?, ?, ?, ?, ?)", records)
+            conn.execute(
+                "INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                (source, stat.st_mtime_ns, stat.st_size, json.dumps(rows[0]) if rows else None),
+            )
+        self._count('imports')
 
+    def export_csv(self, csv_path, target_path=None):
+        """Write the stored rows back out as CSV (to ``target_path`` if given).
+
+        The file is written to a temporary sibling and renamed into place, so
+        readers never see a half-written wortlist.
+        """
+        with self._locked(csv_path):
+            self._export_csv(csv_path, target_path or csv_path)
+            if target_path is None:
+                # Record our own write so the next sync does not re-import it
+                stat = os.stat(csv_path)
+                conn = self._connection()
+                with conn:
+                    conn.execute(
+                        "UPDATE sources SET mtime_ns = ?, size = ? WHERE source = ?",
+                        (stat.st_mtime_ns, stat.st_size, self._source(csv_path)),
+                    )
+        self._count('exports')
+
+    def _export_csv(self, csv_path, target_path):
+        source = self._source(csv_path)
+        conn = self._connection()
+        header_row = conn.execute("SELECT header FROM sources WHERE source = ?", (source,)).fetchone()
+        rows = conn.execute(
+            "SELECT word, frequency, review_date, cells FROM words WHERE source = ? ORDER BY line", (source,)
+        )
+        fd, temp_path = tempfile.mkstemp(prefix='.wortlist-', suffix='.csv', dir=os.path.dirname(os.path.abspath(target_path)))
+        try:
+            with os.fdopen(fd, 'w', newline='') as file:
+                writer = csv.writer(file)
+                if header_row and header_row[0] is not None:
+                    writer.writerow(json.loads(header_row[0]))
+                for word, frequency, review_date, cells in rows:
+                    writer.writerow(json.loads(cells) if cells is not None else [word, frequency, review_date])
+                file.flush()
+                os.fsync(file.fileno())
+            with contextlib.suppress(FileNotFoundError):
+                shutil.copymode(target_path, temp_path)
+            os.replace(temp_path, target_path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+
+    def commit(self, csv_path, updates):
+        """Apply a finished deck's rows and return once the CSV on disk includes them.
+
+        Row updates are applied under the wortlist lock. Concurrent commits to
+        the same list are then group-committed: one thread exports the CSV
+        for every commit that arrived before it started, and the others just
+        wait for that write. Returns False if the CSV does not exist.
+        """
+        with self._locked(csv_path):
+            # Pick up any hand edits to the CSV before applying this deck on top
+            if not self.sync(csv_path):
+                return False
+            self.update_rows(csv_path, updates)
+        self._count('commits')
+
+        source = self._source(csv_path)
+        with self._guard:
+            state = self._exports.setdefault(source, {
+                'cond': threading.Condition(), 'requested': 0, 'exported': 0, 'exporting': False,
+            })
+        cond = state['cond']
+        with cond:
+            state['requested'] += 1
+            ticket = state['requested']
+            while state['exported'] < ticket:
+                if state['exporting']:
+                    cond.wait()
+                    continue
+                state['exporting'] = True
+                covered = state['requested']
+                cond.release()
+                try:
+                    self.export_csv(csv_path)
+                    exported = True
+                except BaseException:
+                    exported = False
+                    raise
+                finally:
+                    cond.acquire()
+                    state['exporting'] = False
+                    if exported:
+                        state['exported'] = max(state['exported'], covered)
+                    cond.notify_all()
+        return True
+
+    def rows(self, csv_path):
+        """All complete rows as ``(line, word, frequency, review_date)`` in file order."""
+        return self._connection().execute(
+            "SELECT line, word, frequency, review_date FROM words WHERE source = ? AND complete ORDER BY line",
+            (self._source(csv_path),),
+        ).fetchall()
+
+    def burned_words(self, csv_path):
+        # Like the original CSV reader, any row whose second column is 'B' counts
+        rows = self._connection().execute(
+            "SELECT word FROM words WHERE source = ? AND frequency = 'B'", (self._source(csv_path),)
+        )
+        return [row[0] for row in rows]
+
+    def update_rows(self, csv_path, updates):
+        """Apply ``{line: [word, frequency, review_date]}`` to the stored rows only."""
+        source = self._source(csv_path)
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "UPDATE words SET word = ?, frequency = ?, review_date = ?, complete = 1, cells = NULL "
+                "WHERE source = ? AND line = ?",
+                [(word, frequency, review_date, source, line) for line, (word, frequency, review_date) in updates.items()],
+            )
+
+
+WORTLIST_STORE = WortlistStore(WORTLIST_STORE_PATH)
+
+
+class WortlistSnapshot:
+    """Parsed, read-only view of one wortlist with precomputed buckets.
+
+    Cards are compact ``(word, line, frequency, date_ordinal)`` tuples;
+    ``date_ordinal`` is 0 for never-reviewed words. Rows whose date does
+    not parse are only counted in ``counts`` and left out of ``due``.
+    """
+
+    __slots__ = ('burned_words', 'counts', 'due', 'due_ordinals', 'unreviewed')
+
+    def __init__(self, rows, burned_words):
+        self.burned_words = tuple(burned_words)
+        self.counts = {}
+        due = []
+        unreviewed = []
+        for line, word, frequency, review_date in rows:
+            if review_date == "":
+                unreviewed.append((word, line, frequency, 0))
+                bucket = "pending"
+            else:
+                try:
+                    ordinal = datetime.strptime(review_date, "%Y-%m-%d").toordinal()
+                except ValueError:
+                    ordinal = None
+                if frequency != "B" and ordinal is not None:
+                    due.append((word, line, frequency, ordinal))
+                bucket = frequency
+            self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        due.sort(key=lambda card: card[3])
+        self.due = tuple(due)
+        self.due_ordinals = [card[3] for card in due]
+        self.unreviewed = tuple(unreviewed)
+
+    @staticmethod
+    def _as_session_row(card):
+        word, line, frequency, ordinal = card
+        review_date = datetime.fromordinal(ordinal).strftime("%Y-%m-%d") if ordinal else ""
+        return [word, line, frequency, review_date]
+
+    def due_words(self, today, limit):
+        """First ``limit`` cards (in file order) due on or before ``today``."""
+        due_count = bisect.bisect_right(self.due_ordinals, today.toordinal())
+        cards = heapq.nsmallest(limit, self.due[:due_count], key=lambda card: card[1])
+        return [self._as_session_row(card) for card in cards]
+
+    def random_unreviewed_words(self, limit):
+        cards = random.sample(self.unreviewed, min(limit, len(self.unreviewed)))
+        return [self._as_session_row(card) for card in cards]
+
+
+class WortlistCache:
+    """Process-wide cache of parsed wortlists, invalidated by CSV mtime and size.
+
+    Every reader gets the in-memory snapshot; only a list whose file changed
+    (hand edit or a deck commit) is reloaded from the store. Reloads hold a
+    per-list lock, so reloading one list never blocks readers of another.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._entries = {}  # source -> ((mtime_ns, size), snapshot)
+        self._load_locks = {}  # source -> Lock held while that list reloads
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'loads': 0}
+
+    def _cached(self, source, version):
+        with self._lock:
+            entry = self._entries.get(source)
+            if entry and entry[0] == version:
+                self._stats['hits'] += 1
+                return entry[1]
+        return None
+
+    def get(self, csv_path):
+        """Return the snapshot for ``csv_path``, or None if the file does not exist."""
+        source = os.path.abspath(csv_path)
+        try:
+            stat = os.stat(source)
+        except FileNotFoundError:
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+        snapshot = self._cached(source, version)
+        if snapshot is not None:
+            return snapshot
+
+        with self._lock:
+            load_lock = self._load_locks.setdefault(source, threading.Lock())
+        with load_lock:
+            # Another thread may have reloaded it while we waited
+            snapshot = self._cached(source, version)
+            if snapshot is not None:
+                return snapshot
+            if not self.store.sync(csv_path):
+                return None
+            snapshot = WortlistSnapshot(self.store.rows(csv_path), self.store.burned_words(csv_path))
+            # Key by the version seen before reading: a commit racing the reads
+            # then only costs one extra reload instead of caching stale rows
+            with self._lock:
+                self._entries[source] = (version, snapshot)
+                self._stats['loads'] += 1
+            return snapshot
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
+WORTLIST_CACHE = WortlistCache(WORTLIST_STORE)
 
-def _save_generated_image(image_base64: str, sentence: str) -> str:
-    _prune_generated_images()
-    sentence_token = _anki_sentence_token(sentence)
-    unique_token = hashlib.sha256(f"{sentence_token}:{time.time()}".encode("utf-8")).hexdigest()[:24]
-    filename = f"{unique_token}.webp"
-    path = os.path.join(GENERATED_IMAGES_DIR, filename)
-    image_bytes = base64.b64decode(image_base64, validate=True)
-    with open(path, 'wb') as image_file:
-        image_file.write(image_bytes)
-    return filename
 
 def get_current_wortlist_file():
     # fall back to default if none selected
-    if has_request_context():
-        print(f"Using Wortlist: {session.get('wortlist_file', DEFAULT_WORTLIST_FILE)}")
     return session.get("wortlist_file", DEFAULT_WORTLIST_FILE)
 
 def generate_story_background(session_key, wortlist_file, scenario_text):
     burned_words = get_burned_words(wortlist_file)
     # Initialize status so the page can render a placeholder immediately
-    story_results[session_key] = {
+    story_results.put(session_key, {
         'german_status': 'in_progress',
         'english_status': 'pending',
         'german': '',
         'english': '',
-        'created_at': datetime.utcnow().isoformat(),
-    }
+    }, session_key)
 
     # Build a concise prompt for faster response. If local wortlists are not
     # available yet, still generate a story from the scenario instead of failing.
@@ -203,17 +2427,32 @@ def generate_story_background(session_key, wortlist_file, scenario_text):
     ]
 
     try:
-        # Use a lighter model and lower reasoning to speed up German story
-        german_story = get_completion_from_messages(messages, model="gpt-5", max_tokens=None, reasoning_effort="medium")
+        if STORY_STREAMING:
+            # Publish partial text as tokens arrive so /story_stream can show it
+            german_story = ''
+            published_at = 0.0
+            for delta in stream_completion_from_messages(messages, task='story'):
+                german_story += delta
+                if time.monotonic() - published_at >= STORY_STREAM_PUBLISH_SECONDS:
+                    story_results.update(session_key, {'german': german_story})
+                    published_at = time.monotonic()
+        else:
+            german_story = get_completion_from_messages(messages, task='story')
         german_story = german_story.strip()
-        story_results[session_key]['german'] = german_story
-        story_results[session_key]['german_status'] = 'done'
-
-        # Kick off English translation in a separate thread so the page can update later
-        Thread(target=generate_english_translation, args=(session_key,), daemon=True).start()
+        story_results.update(session_key, {'german': german_story, 'german_status': 'done'})
+
+        # Kick off English translation in the background so the page can update later
+        BACKGROUND_EXECUTOR.submit(
+            generate_english_translation, session_key,
+            priority=PRIORITY_STORY,
+            on_reject=lambda: _fail_story_job(session_key, 'english', "Error translating story: server is busy"),
+        )
     except Exception as e:
-        story_results[session_key]['german'] = f"Error generating story: {e}"
-        story_results[session_key]['german_status'] = 'error'
+        story_results.update(session_key, {'german': f"Error generating story: {e}", 'german_status': 'error'})
+
+
+def _fail_story_job(session_key, language, message):
+    story_results.update(session_key, {language: message, f'{language}_status': 'error'})
 
 
 def generate_english_translation(session_key: str):
@@ -221,19 +2460,17 @@ def generate_english_translation(session_key: str):
     result = story_results.get(session_key)
     if not result or not result.get('german'):
         return
-    story_results[session_key]['english_status'] = 'in_progress'
+    story_results.update(session_key, {'english_status': 'in_progress'})
     try:
         messages = [
             {'role': 'system', 'content': 'You are a helpful language teacher.'},
             {'role': 'user', 'content': 'Translate this German story to English.'},
             {'role': 'assistant', 'content': result['german']}
         ]
-        english_story = get_completion_from_messages(messages, model="gpt-5-mini", max_tokens=None)
-        story_results[session_key]['english'] = english_story.strip()
-        story_results[session_key]['english_status'] = 'done'
+        english_story = get_completion_from_messages(messages, task='story_translation')
+        story_results.update(session_key, {'english': english_story.strip(), 'english_status': 'done'})
     except Exception as e:
-        story_results[session_key]['english'] = f"Error translating story: {e}"
-        story_results[session_key]['english_status'] = 'error'
+        story_results.update(session_key, {'english': f"Error translating story: {e}", 'english_status': 'error'})
 
 
 
@@ -252,15 +2489,11 @@ def get_burned_words(wortlist_file):
         files_to_read = [file_path]
 
     for path in files_to_read:
-        try:
-            with open(path, 'r', newline='') as file:
-                reader = csv.reader(file)
-                next(reader, None)
-                for row in reader:
-                    if len(row) >= 2 and row[1] == "B":
-                        burned_words.append(row[0])
-        except FileNotFoundError:
+        wortlist = WORTLIST_CACHE.get(path)
+        if wortlist is None:
             print(f"File not found: {path}")
+            continue
+        burned_words.extend(wortlist.burned_words)
 
     # Shuffle to ensure random order each time
     random.shuffle(burned_words)
@@ -269,11 +2502,153 @@ def get_burned_words(wortlist_file):
 
 
 
-def get_completion_from_messages(messages, model="gpt-5-nano", max_tokens=2000, reasoning_effort="minimal", verbosity=None, text_format=None):
-    """
-    messages: [{'role':'system','content':'...'}, {'role':'user','content':'...'}, ...]
-    reasoning_effort: "low", "medium", or "high"
-    """
+# Model profile per task. Tiers run from best to fastest: while a tier's
+# rolling p95 is over the task's budget, calls go to the next one. Samples
+# older than MODEL_ROUTE_WINDOW_SECONDS are dropped, so a tier that was
+# skipped gets tried again once its slow samples age out.
+MODEL_ROUTES = {
+    'story': {'budget_seconds': 90, 'tiers': [
+        {'model': 'gpt-5', 'effort': 'medium', 'verbosity': None, 'max_tokens': None},
+        {'model': 'gpt-5-mini', 'effort': 'low', 'verbosity': None, 'max_tokens': None},
+    ]},
+    'story_translation': {'budget_seconds': 45, 'tiers': [
+        {'model': 'gpt-5-mini', 'effort': 'minimal', 'verbosity': None, 'max_tokens': None},
+        {'model': 'gpt-5-nano', 'effort': 'minimal', 'verbosity': None, 'max_tokens': None},
+    ]},
+    'deck_sentences': {'budget_seconds': 20, 'tiers': [
+        {'model': 'gpt-5-mini', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 2000},
+        {'model': 'gpt-5-nano', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 2000},
+    ]},
+    'deck_translation': {'budget_seconds': 20, 'tiers': [
+        {'model': 'gpt-5-nano', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 4000},
+    ]},
+    'word_translation': {'budget_seconds': 5, 'tiers': [
+        {'model': 'gpt-5-nano', 'effort': 'minimal', 'verbosity': 'low', 'max_tokens': None},
+    ]},
+    'sentence_translation': {'budget_seconds': 8, 'tiers': [
+        {'model': 'gpt-5-nano', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 100},
+    ]},
+    'grammar_check': {'budget_seconds': 10, 'tiers': [
+        {'model': 'gpt-5-mini', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 500},
+        {'model': 'gpt-5-nano', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 500},
+    ]},
+    'chat': {'budget_seconds': 10, 'tiers': [
+        {'model': 'gpt-5-mini', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 400},
+        {'model': 'gpt-5-nano', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 400},
+    ]},
+    'bank_sentences': {'budget_seconds': None, 'tiers': [
+        {'model': 'gpt-5-mini', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 6000},
+    ]},
+    'chat_summary': {'budget_seconds': 20, 'tiers': [
+        {'model': 'gpt-5-nano', 'effort': 'minimal', 'verbosity': None, 'max_tokens': 400},
+    ]},
+}
+# JSON file with the same shape; tasks it lists replace the defaults. Re-read when it changes.
+MODEL_ROUTES_PATH = os.getenv("MODEL_ROUTES_PATH")
+MODEL_ROUTES_RELOAD_SECONDS = 5
+MODEL_ROUTE_WINDOW_SECONDS = 300
+MODEL_ROUTE_MIN_SAMPLES = 5
+
+
+class ModelRouter:
+    """Pick the model profile for a task from MODEL_ROUTES and observed latencies."""
+
+    def __init__(self, routes, path=None):
+        self.defaults = routes
+        self.path = path
+        self._routes = routes
+        self._mtime = None
+        self._checked_at = 0.0
+        self._samples = {}  # (task, model, effort) -> deque of (monotonic, seconds)
+        self._lock = threading.Lock()
+
+    def routes(self):
+        if self.path and time.monotonic() - self._checked_at >= MODEL_ROUTES_RELOAD_SECONDS:
+            self._reload()
+        return self._routes
+
+    def _reload(self):
+        self._checked_at = time.monotonic()
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return
+            with open(self.path) as file:
+                overrides = json.load(file)
+            routes = {**self.defaults, **overrides}
+            for task, route in routes.items():
+                if not route.get('tiers') or not all(tier.get('model') for tier in route['tiers']):
+                    raise ValueError(f"Route {task!r} needs at least one tier with a model")
+        except FileNotFoundError:
+            routes, mtime = self.defaults, None
+        except Exception:
+            # Keep serving the last good table
+            print(traceback.format_exc())
+            return
+        self._routes, self._mtime = routes, mtime
+
+    def _tier_key(self, task, tier):
+        return task, tier['model'], tier.get('effort', 'minimal')
+
+    def p95(self, task, tier):
+        cutoff = time.monotonic() - MODEL_ROUTE_WINDOW_SECONDS
+        with self._lock:
+            samples = self._samples.get(self._tier_key(task, tier))
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            latencies = sorted(seconds for _, seconds in samples or ())
+        if len(latencies) < MODEL_ROUTE_MIN_SAMPLES:
+            return None
+        return latencies[int(0.95 * (len(latencies) - 1))]
+
+    def route(self, task):
+        """Return the profile dict to use for ``task``."""
+        route = self.routes()[task]
+        budget = route.get('budget_seconds')
+        tiers = route['tiers']
+        chosen = tiers[-1]
+        for tier in tiers:
+            p95 = self.p95(task, tier) if budget else None
+            if p95 is None or p95 <= budget:
+                chosen = tier
+                break
+        METRICS.inc('model_route_total', {
+            'task': task, 'model': chosen['model'], 'fallback': str(chosen is not tiers[0]).lower(),
+        })
+        return {'effort': 'minimal', 'verbosity': None, 'max_tokens': None, **chosen}
+
+    def primary(self, task):
+        """The first tier of ``task``, whatever the latencies; used to key caches."""
+        return self.routes()[task]['tiers'][0]
+
+    def stats(self):
+        """``(task, tier, p95 or None, budget)`` for every configured tier."""
+        return [
+            (task, tier, self.p95(task, tier), route.get('budget_seconds'))
+            for task, route in self.routes().items() for tier in route['tiers']
+        ]
+
+    def observe(self, task, profile, seconds):
+        with self._lock:
+            self._samples.setdefault(self._tier_key(task, profile), collections.deque(maxlen=200)).append(
+                (time.monotonic(), seconds)
+            )
+
+    @contextlib.contextmanager
+    def timed(self, task, profile):
+        """Time the block, failures included, as a latency sample for ``profile``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(task, profile, time.perf_counter() - started)
+
+
+MODEL_ROUTER = ModelRouter(MODEL_ROUTES, MODEL_ROUTES_PATH)
+METRICS.counter('model_route_total', 'Completion calls by task and routed model; fallback="true" when over budget.')
+
+
+def _completion_args(messages, model, max_tokens, reasoning_effort, verbosity, text_format):
     create_args = {
         "model": model,
         "input": messages,
@@ -287,14 +2662,105 @@ def get_completion_from_messages(messages, model="gpt-5-nano", max_tokens=2000,
             create_args["text"]["verbosity"] = verbosity
         if text_format is not None:
             create_args["text"]["format"] = text_format
-    resp = openai_post("/responses", create_args)
+    return create_args
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers with the same key share its outcome."""
+
+    def __init__(self):
+        self._inflight = {}  # key -> {'done': threading.Event, 'result': ..., 'error': Exception|None}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = {'done': threading.Event(), 'result': None, 'error': None}
+        METRICS.inc('openai_singleflight_total', {'role': 'leader' if leader else 'follower'})
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call['done'].set()
+
+
+COMPLETION_FLIGHTS = SingleFlight()
+METRICS.counter('openai_singleflight_total', 'Completion calls that led an upstream request or joined one in flight.')
+
+
+def get_completion_from_messages(messages, model="gpt-5-nano", max_tokens=2000, reasoning_effort="minimal", verbosity=None, text_format=None, task=None):
+    """
+    messages: [{'role':'system','content':'...'}, {'role':'user','content':'...'}, ...]
+    reasoning_effort: "low", "medium", or "high"
+    task: a MODEL_ROUTES key; its routed profile replaces model, max_tokens,
+          reasoning_effort and verbosity
+
+    Identical requests already in flight (same model, input, reasoning and
+    format) share one upstream call instead of sending another.
+    """
+    if task is None:
+        create_args = _completion_args(messages, model, max_tokens, reasoning_effort, verbosity, text_format)
+        return extract_response_text(_coalesced_completion(create_args))
+
+    profile = MODEL_ROUTER.route(task)
+    create_args = _completion_args(
+        messages, profile['model'], profile['max_tokens'], profile['effort'], profile['verbosity'], text_format,
+    )
+    with MODEL_ROUTER.timed(task, profile):
+        return extract_response_text(_coalesced_completion(create_args))
+
 
-    return extract_response_text(resp)
+def _coalesced_completion(create_args):
+    payload = json.dumps(create_args, sort_keys=True, ensure_ascii=False)
+    key = hashlib.sha256(unicodedata.normalize('NFC', payload).encode('utf-8')).hexdigest()
+    return COMPLETION_FLIGHTS.do(key, lambda: openai_post("/responses", create_args))
+
+
+def stream_completion_from_messages(messages, model="gpt-5-nano", max_tokens=2000, reasoning_effort="minimal", verbosity=None, text_format=None, task=None):
+    """Like get_completion_from_messages, but yields text deltas as they arrive."""
+    if task is None:
+        create_args = _completion_args(messages, model, max_tokens, reasoning_effort, verbosity, text_format)
+        yield from _stream_completion_deltas(create_args)
+        return
+
+    profile = MODEL_ROUTER.route(task)
+    create_args = _completion_args(
+        messages, profile['model'], profile['max_tokens'], profile['effort'], profile['verbosity'], text_format,
+    )
+    with MODEL_ROUTER.timed(task, profile):
+        yield from _stream_completion_deltas(create_args)
+
+
+def _stream_completion_deltas(create_args):
+    for event in openai_stream("/responses", create_args):
+        event_type = event.get("type")
+        if event_type == "response.output_text.delta":
+            yield event.get("delta", "")
+        elif event_type in ("response.failed", "error"):
+            error = event.get("error") or (event.get("response") or {}).get("error") or event_type
+            raise RuntimeError(f"OpenAI streaming error: {error}")
 
 def get_selected_level():
     """Return 'A1' or 'A2' based on the user's wortlist choice."""
-    file_path = get_current_wortlist_file()
-    return 'A2' if file_path == 'A2Wortlist.csv' else 'A1'
+    return _wortlist_level(get_current_wortlist_file())
+
+
+def _wortlist_level(wortlist_file):
+    return 'A2' if os.path.basename(wortlist_file) == 'A2Wortlist.csv' else 'A1'
 
 def _get_session_id():
     try:
@@ -303,16 +2769,23 @@ def _get_session_id():
         # Fallback if Flask-Session sid is unavailable
         return request.cookies.get(app.session_cookie_name, "unknown")
 
+def _normalize_text(text: str = None):
+    normalized = (text or '').strip()
+    if not normalized:
+        return ''
+    return unicodedata.normalize('NFC', normalized)
+
+
 def _anki_sentence_token(german_sentence: str = None):
-    normalized = (german_sentence or '').strip()
+    normalized = _normalize_text(german_sentence)
     if not normalized:
         return "no-sentence"
-    normalized = unicodedata.normalize('NFC', normalized)
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
 
 
-def _anki_job_key(card_number: int, wort: str = None, german_sentence: str = None):
-    base = f"{_get_session_id()}:{card_number}"
+def _anki_job_key(card_number: int, wort: str = None, german_sentence: str = None, session_key: str = None):
+    # Background threads have no request context and must pass session_key
+    base = f"{session_key or _get_session_id()}:{card_number}"
     if wort:
         try:
             w = unicodedata.normalize('NFC', str(wort)).lower()
@@ -324,47 +2797,20 @@ def _anki_job_key(card_number: int, wort: str = None, german_sentence: str = Non
     return base
 
 
-def _job_created_at(job):
-    created_at = job.get("created_at")
-    if not created_at:
-        return datetime.min
-    try:
-        return datetime.fromisoformat(created_at)
-    except (TypeError, ValueError):
-        return datetime.min
-
-
-def _prune_job_store(job_store):
-    now = datetime.utcnow()
-    expired_keys = [
-        key for key, job in job_store.items()
-        if now - _job_created_at(job) > BACKGROUND_JOB_TTL
-    ]
-    for key in expired_keys:
-        job_store.pop(key, None)
-
-    if len(job_store) <= MAX_BACKGROUND_JOBS:
-        return
-
-    sorted_keys = sorted(job_store, key=lambda key: _job_created_at(job_store[key]))
-    for key in sorted_keys[:len(job_store) - MAX_BACKGROUND_JOBS]:
-        job_store.pop(key, None)
-
-
 def _prune_background_jobs():
-    _prune_job_store(story_results)
-    _prune_job_store(anki_sentences_jobs)
-    _prune_job_store(anki_translation_jobs)
+    story_results.prune()
+    anki_sentences_jobs.prune()
+    anki_translation_jobs.prune()
+    conversation_summary_jobs.prune()
+    conversation_reply_jobs.prune()
+    conversation_review_jobs.prune()
 
 
 def _clear_session_background_jobs(session_key):
-    story_results.pop(session_key, None)
-    anki_sentences_jobs.pop(session_key, None)
-
-    prefix = f"{session_key}:"
-    stale_translation_keys = [key for key in anki_translation_jobs if key.startswith(prefix)]
-    for key in stale_translation_keys:
-        anki_translation_jobs.pop(key, None)
+    # Popping wakes anyone still waiting on the old deck's jobs
+    story_results.clear_session(session_key)
+    anki_sentences_jobs.clear_session(session_key)
+    anki_translation_jobs.clear_session(session_key)
 
 
 def _reset_anki_session_state(session_key):
@@ -378,6 +2824,7 @@ def _reset_anki_session_state(session_key):
         'selected_words_lineNumber',
     ):
         session.pop(session_key_name, None)
+    BACKGROUND_EXECUTOR.cancel(_lookahead_tag(session_key))
     _clear_session_background_jobs(session_key)
 
 
@@ -464,51 +2911,51 @@ def _get_current_anki_sentence(active_state=None, wort=None):
     session['anki_sentence_word'] = wort
     return anki_sentence
 
-def _start_anki_prefetch(card_number: int, wort: str, german_sentence: str):
+def _start_anki_prefetch(card_number: int, wort: str, german_sentence: str, session_key: str = None,
+                         priority=PRIORITY_INTERACTIVE, tag=None):
     """Start background tasks to fetch: (1) one-word translation, (2) English sentence translation.
-    Stores progress/results in anki_translation_jobs.
+    Stores progress/results in anki_translation_jobs. Usually the deck batch
+    (_translate_anki_deck) has already filled the job, making this a lookup.
     """
     if card_number is None or not wort:
         return False
 
     _prune_background_jobs()
-    key = _anki_job_key(card_number, wort, german_sentence)
-    # If an existing job for this card exists and is in progress or done, don't restart
+    session_key = session_key or _get_session_id()
+    key = _anki_job_key(card_number, wort, german_sentence, session_key=session_key)
+    # Queued halves are tagged with the job key so a later call can move them up
+    tags = (key, tag) if tag else (key,)
+    kinds = ('word', 'sentence')
     existing = anki_translation_jobs.get(key)
-    if existing:
-        existing_sentence = (existing.get('german_sentence') or '').strip()
-        requested_sentence = (german_sentence or '').strip()
-        if existing.get('word') == wort and existing_sentence == requested_sentence and (
-            existing.get('word_status') in ('in_progress', 'done') or existing.get('sentence_status') in ('in_progress', 'done')
-        ):
+    if existing and existing.get('word') == wort and \
+            (existing.get('german_sentence') or '').strip() == (german_sentence or '').strip():
+        # Lookahead may have queued this card at low priority; it is wanted now
+        BACKGROUND_EXECUTOR.promote(key, priority)
+        # Restart only the halves that failed (for example shed under load)
+        kinds = tuple(kind for kind in kinds if existing.get(f'{kind}_status') not in ('in_progress', 'done'))
+        if not kinds:
             return True
+        anki_translation_jobs.update(key, {
+            **{f'{kind}_translation': None for kind in kinds},
+            **{f'{kind}_status': 'in_progress' for kind in kinds},
+        })
+    else:
         anki_translation_jobs.pop(key, None)
-
-    anki_translation_jobs[key] = {
-        'word': wort,
-        'german_sentence': german_sentence or '',
-        'word_translation': None,
-        'word_status': 'in_progress' if wort else 'error',
-        'sentence_translation': None,
-        'sentence_status': 'in_progress',
-        'created_at': datetime.utcnow().isoformat()
-    }
+        anki_translation_jobs.put(key, {
+            'word': wort,
+            'german_sentence': german_sentence or '',
+            'word_translation': None,
+            'word_status': 'in_progress' if wort else 'error',
+            'sentence_translation': None,
+            'sentence_status': 'in_progress',
+        }, session_key)
 
     def compute_word():
         try:
-            messages = [
-                {'role': 'system', 'content': 'Respond with a single English word only. No sentences or explanations.'},
-                {'role': 'user', 'content': 'One Word English translation for: Klima'},
-                {'role': 'assistant', 'content': 'Climate'},
-                {'role': 'user', 'content': f'One Word English translation for: {wort}'},
-            ]
-            # Remove max_output_tokens (use model default) and set verbosity low for concise output
-            resp = get_completion_from_messages(messages, model="gpt-5-nano", max_tokens=None, verbosity="low")
-            anki_translation_jobs[key]['word_translation'] = resp.strip()
-            anki_translation_jobs[key]['word_status'] = 'done'
+            resp = translateWordToEnglish(wort)
+            anki_translation_jobs.update(key, {'word_translation': resp.strip(), 'word_status': 'done'})
         except Exception as e:
-            anki_translation_jobs[key]['word_translation'] = f"Error: {e}"
-            anki_translation_jobs[key]['word_status'] = 'error'
+            anki_translation_jobs.update(key, {'word_translation': f"Error: {e}", 'word_status': 'error'})
 
     def compute_sentence():
         try:
@@ -517,91 +2964,204 @@ def _start_anki_prefetch(card_number: int, wort: str, german_sentence: str):
             if not gs:
                 raise ValueError('No German sentence found for this word')
             resp = translateToEnglish(gs)
-            anki_translation_jobs[key]['sentence_translation'] = resp.strip()
-            anki_translation_jobs[key]['sentence_status'] = 'done'
+            anki_translation_jobs.update(key, {'sentence_translation': resp.strip(), 'sentence_status': 'done'})
         except Exception as e:
-            anki_translation_jobs[key]['sentence_translation'] = f"Error: {e}"
-            anki_translation_jobs[key]['sentence_status'] = 'error'
-
-    # Run in background threads
-    Thread(target=compute_word, daemon=True).start()
-    Thread(target=compute_sentence, daemon=True).start()
+            anki_translation_jobs.update(key, {'sentence_translation': f"Error: {e}", 'sentence_status': 'error'})
+
+    def reject(kind):
+        def mark_busy():
+            anki_translation_jobs.update(key, {
+                f'{kind}_translation': "Error: server is busy, please retry",
+                f'{kind}_status': 'error',
+            })
+        return mark_busy
+
+    # The current card is what the user is looking at, so it goes ahead of stories
+    compute = {'word': compute_word, 'sentence': compute_sentence}
+    for kind in kinds:
+        BACKGROUND_EXECUTOR.submit(compute[kind], priority=priority, on_reject=reject(kind), tag=tags)
     return True
 
-## Removed: Assistants API helpers (migrated to Responses API)
 
+def _lookahead_tag(session_key):
+    return f"lookahead:{session_key}"
 
-def chooseSelectedWords():
-    # Go through the file
-    # Add 10 words with today's date or earlier to selected words as array: [word, line number in wortLines]
-    # Also in the case that 10 words are not found, keep an array of [word,line number] that do not have reviewData
-    # Then check for the number of not found words,
-    # and choose that number from the array in random and add to the selected words array
 
-    # Format [Word, LineNumber, ReviewFrequency, ReviewDateString]
-    selected_words_lineNumber = []
+def _start_anki_lookahead(active_state, session_key):
+    """Speculatively prepare cards N+1..N+ANKI_LOOKAHEAD_CARDS at low priority.
+
+    Translations go through _start_anki_prefetch (a no-op for cards the deck
+    batch already covered); image hints are optional. Queued work is tagged
+    per session so _reset_anki_session_state can cancel it.
+    """
+    anki_sentences = session.get('anki_sentences')
+    if ANKI_LOOKAHEAD_CARDS <= 0 or not anki_sentences or anki_sentences.startswith('Error'):
+        return 0
+
+    selected_words_lineNumber = active_state['selected_words_lineNumber']
+    position = active_state['selected_words_position']
+    tag = _lookahead_tag(session_key)
+    started = 0
+    for index in range(position + 1, min(position + 1 + ANKI_LOOKAHEAD_CARDS, len(selected_words_lineNumber))):
+        wort = selected_words_lineNumber[index][0]
+        german_sentence = _lookup_sentence_for_word(anki_sentences, wort)
+        if not german_sentence:
+            continue
+        _start_anki_prefetch(index + 1, wort, german_sentence, session_key=session_key,
+                             priority=PRIORITY_SPECULATIVE, tag=tag)
+        frequency1, frequency2 = FREQUENCY_OPTIONS.get(selected_words_lineNumber[index][2], ("T", "W"))
+        if ANKI_LOOKAHEAD_IMAGE_HINTS and 'B' not in {frequency1, frequency2}:
+            BACKGROUND_EXECUTOR.submit(_prefetch_image_hint, german_sentence, priority=PRIORITY_SPECULATIVE, tag=tag)
+        started += 1
+    return started
+
+
+def _prefetch_image_hint(sentence):
+    try:
+        get_image_hint(sentence)
+    except Exception:
+        print(traceback.format_exc())
+
+
+DECK_TRANSLATION_SCHEMA = {
+    "type": "json_schema",
+    "name": "deck_translations",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "cards": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "word": {"type": "string"},
+                        "word_translation": {"type": "string"},
+                        "sentence_translation": {"type": "string"},
+                    },
+                    "required": ["word", "word_translation", "sentence_translation"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["cards"],
+        "additionalProperties": False,
+    },
+}
+
+
+def _translate_anki_deck(session_key, deck_words, anki_sentences):
+    """Translate every card of a freshly generated deck in one structured call.
+
+    Runs in the background right after the deck sentences land. Results go
+    into TRANSLATION_CACHE and into the per-card anki_translation_jobs, so
+    the per-card prefetch only has to look them up. Cards the batch could
+    not cover fall back to _start_anki_prefetch.
+
+    ``deck_words`` must be in ``selected_words_lineNumber`` order: card
+    numbers (and so job keys) are positions in that list, as in /anki.
+    """
+    word_model = MODEL_ROUTER.primary('word_translation')['model']
+    sentence_model = MODEL_ROUTER.primary('sentence_translation')['model']
+    cards = []
+    for number, wort in enumerate(deck_words, start=1):
+        german_sentence = _lookup_sentence_for_word(anki_sentences, wort)
+        if not german_sentence:
+            continue
+        key = _anki_job_key(number, wort, german_sentence, session_key=session_key)
+        cards.append({
+            'number': number,
+            'key': key,
+            'word': wort,
+            'german_sentence': german_sentence,
+            'word_translation': TRANSLATION_CACHE.get(WORD_TRANSLATION_PROMPT_VERSION, word_model, wort),
+            'sentence_translation': TRANSLATION_CACHE.get(SENTENCE_TRANSLATION_PROMPT_VERSION, sentence_model, german_sentence),
+        })
+        if not anki_translation_jobs.get(key):
+            anki_translation_jobs.put(key, {
+                'word': wort,
+                'german_sentence': german_sentence,
+                'word_translation': None,
+                'word_status': 'in_progress',
+                'sentence_translation': None,
+                'sentence_status': 'in_progress',
+            }, session_key)
+
+    missing = [card for card in cards if card['word_translation'] is None or card['sentence_translation'] is None]
+    if missing:
+        prompt = "Translate each German word and its example sentence to English.\n" \
+            "For word_translation give a single English word only.\n\n" + \
+            "\n".join(json.dumps({'word': card['word'], 'sentence': card['german_sentence']}, ensure_ascii=False) for card in missing)
+        messages = [
+            {'role': 'system', 'content': 'You are a helpful language teacher.'},
+            {'role': 'user', 'content': prompt},
+        ]
+        try:
+            resp = get_completion_from_messages(
+                messages, task='deck_translation', text_format=DECK_TRANSLATION_SCHEMA,
+            )
+            translated = {
+                _normalize_text(item.get('word')).lower(): item
+                for item in json.loads(resp).get('cards', [])
+            }
+        except Exception:
+            print(traceback.format_exc())
+            translated = {}
+        for card in missing:
+            item = translated.get(_normalize_text(card['word']).lower()) or {}
+            word_translation = (item.get('word_translation') or '').strip()
+            sentence_translation = (item.get('sentence_translation') or '').strip()
+            if card['word_translation'] is None and word_translation:
+                card['word_translation'] = word_translation
+                TRANSLATION_CACHE.set(WORD_TRANSLATION_PROMPT_VERSION, word_model, card['word'], word_translation)
+            if card['sentence_translation'] is None and sentence_translation:
+                card['sentence_translation'] = sentence_translation
+                TRANSLATION_CACHE.set(SENTENCE_TRANSLATION_PROMPT_VERSION, sentence_model, card['german_sentence'], sentence_translation)
+
+    for card in cards:
+        if card['word_translation'] is None or card['sentence_translation'] is None:
+            # Not covered by the batch: let the per-card path translate it
+            anki_translation_jobs.pop(card['key'], None)
+            _start_anki_prefetch(card['number'], card['word'], card['german_sentence'], session_key=session_key)
+            continue
+        anki_translation_jobs.update(card['key'], {
+            'word_translation': card['word_translation'],
+            'word_status': 'done',
+            'sentence_translation': card['sentence_translation'],
+            'sentence_status': 'done',
+        })
 
+## Removed: Assistants API helpers (migrated to Responses API)
 
-    not_reviewed_words = []
-    number_burned = 0
-    number_week = 0
-    number_month = 0
-    number_3_month = 0
-    number_pending = 0
-    number_tomorrow = 0
-    total_lines = 0
 
+def chooseSelectedWords():
+    # Pick up to 10 reviewed words that are due today or earlier (in file order),
+    # then top up with random never-reviewed words if fewer than 10 are due.
+    # Both come from the cached, pre-bucketed wortlist snapshot.
+
+    # Format [Word, LineNumber, ReviewFrequency, ReviewDateString]
     file_path = get_current_wortlist_file()
 
-    if not os.path.exists(file_path):
+    wortlist = WORTLIST_CACHE.get(file_path)
+    if wortlist is None:
         print(f"Wortlist file missing: {file_path}")
         return [], [], 0, 0, 0, 0, 0, 0
 
     today = datetime.now().date()
-    with open(file_path, 'r', newline='') as file:
-        reader = csv.reader(file)
-        next(reader, None)
-        for lineNumber, row in enumerate(reader, start=1):
-            if len(row) < 3:
-                continue
-
-            word, reviewFrequency, reviewDateString = row[0], row[1], row[2]
-
-            if reviewDateString == "":
-                not_reviewed_words.append([word, lineNumber, reviewFrequency, reviewDateString])
-                number_pending = number_pending + 1
-            elif reviewFrequency != "B":
-                reviewDateObject = datetime.strptime(reviewDateString, "%Y-%m-%d").date()
-                if reviewDateObject <= today and len(selected_words_lineNumber) < 10:
-                    selected_words_lineNumber.append([word, lineNumber, reviewFrequency, reviewDateString])
-
-                if reviewFrequency == "W":
-                    number_week = number_week + 1
-                elif reviewFrequency == "M":
-                    number_month = number_month + 1
-                elif reviewFrequency == "3M":
-                    number_3_month = number_3_month + 1
-                elif reviewFrequency == "T":
-                    number_tomorrow = number_tomorrow + 1
-            else:
-                number_burned = number_burned + 1
-
-            total_lines = total_lines + 1
-
-    # print("Number of selected words using reviewDate:", len(selected_words_lineNumber))
+    selected_words_lineNumber = wortlist.due_words(today, 10)
 
     # Check if selected_words has 10 orders or add random words to it
     num_selected_words = len(selected_words_lineNumber)
     if num_selected_words < 10:
-        num_missing = 10 - num_selected_words
-        if num_missing <= len(not_reviewed_words):
-            random_word_indices = random.sample(range(0, len(not_reviewed_words)), num_missing)
-        else:
-            random_word_indices = random.sample(range(0, len(not_reviewed_words)), len(not_reviewed_words))
-        for random_index in random_word_indices:
-            selected_words_lineNumber.append(not_reviewed_words[random_index])
+        selected_words_lineNumber.extend(wortlist.random_unreviewed_words(10 - num_selected_words))
 
-    # print("Number of selected words after adding random:", len(selected_words_lineNumber))
+    counts = wortlist.counts
+    number_burned = counts.get("B", 0)
+    number_week = counts.get("W", 0)
+    number_month = counts.get("M", 0)
+    number_3_month = counts.get("3M", 0)
+    number_pending = counts.get("pending", 0)
+    number_tomorrow = counts.get("T", 0)
 
     # Create a list of selected words
     selected_words = []
@@ -609,27 +3169,208 @@ def chooseSelectedWords():
         selected_words.append(selected_word_lineNumber[0])
     random.shuffle(selected_words)
 
-    # percentage_burned = number_burned / total_lines
-
     return selected_words_lineNumber, selected_words, number_burned, number_week, number_month, number_3_month, number_pending, number_tomorrow
 
+SENTENCE_BANK_SCHEMA = {
+    "type": "json_schema",
+    "name": "sentence_bank",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "words": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "word": {"type": "string"},
+                        "word_translation": {"type": "string"},
+                        "sentences": {
+                            "type": "array",
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "german": {"type": "string"},
+                                    "english": {"type": "string"},
+                                },
+                                "required": ["german", "english"],
+                                "additionalProperties": False,
+                            },
+                        },
+                    },
+                    "required": ["word", "word_translation", "sentences"],
+                    "additionalProperties": False,
+                },
+            },
+        },
+        "required": ["words"],
+        "additionalProperties": False,
+    },
+}
+
+
+def _generate_bank_sentences(level, words, variants):
+    """Return ``{word: (word_translation, [(german, english), ...])}`` for the words the model covered."""
+    prompt = f"""
+        You are creating example sentences for vocabulary review at level {level}.
+        1) For each of these words, write {variants} different simple, natural German sentences that use the word: {', '.join(words)}.
+        2) Constraint: Use only nouns, verbs and adjectives that are part of the Goethe-Zertifikat {level} vocabulary list. Do not use any noun or verb that is outside this list.
+           Function words (articles, pronouns, prepositions, conjunctions) are allowed as needed.
+        3) Keep grammar and vocabulary appropriate for level {level}.
+        4) For each word give a single English word as word_translation, and the English translation of every sentence.
+    """
+    messages = [
+        {'role': 'system', 'content': 'You are a helpful language teacher.'},
+        {'role': 'user', 'content': prompt}
+    ]
+    resp = get_completion_from_messages(messages, task='bank_sentences', text_format=SENTENCE_BANK_SCHEMA)
+    requested = {SentenceBank.word_key(word): word for word in words}
+    generated = {}
+    for item in json.loads(resp).get('words', []):
+        word = requested.get(SentenceBank.word_key(item.get('word')))
+        word_translation = (item.get('word_translation') or '').strip()
+        pairs = [
+            (sentence['german'].strip(), sentence['english'].strip())
+            for sentence in item.get('sentences', [])
+            if (sentence.get('german') or '').strip() and (sentence.get('english') or '').strip()
+        ]
+        if word and word_translation and pairs:
+            generated[word] = (word_translation, pairs)
+    return generated
+
+
+def fill_sentence_bank(level, words, variants=SENTENCE_BANK_VARIANTS, workers=1, progress=None):
+    """Generate and store sentences for ``words`` in batches; returns how many words were filled.
+
+    ``progress(done_words)`` is called after each batch. Failed batches are
+    logged and skipped, so a rerun picks up where this one left off.
+    """
+    batches = [words[start:start + SENTENCE_BANK_BATCH_WORDS] for start in range(0, len(words), SENTENCE_BANK_BATCH_WORDS)]
+
+    def fill(batch):
+        try:
+            generated = _generate_bank_sentences(level, batch, variants)
+        except Exception:
+            print(traceback.format_exc())
+            return 0
+        for word, (word_translation, pairs) in generated.items():
+            SENTENCE_BANK.add(level, word, word_translation, pairs)
+        return len(generated)
+
+    filled = 0
+    done = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch, count in zip(batches, pool.map(fill, batches)):
+            filled += count
+            done += len(batch)
+            if progress:
+                progress(done)
+    return filled
+
+
+def _start_sentence_bank_refill(level, words):
+    """Top up, at low priority, banked deck words that have run short of variants.
+
+    Only pass words the bank served: words it lacks entirely are added from
+    the deck's own sentences (_bank_deck_sentences) rather than by an extra
+    model call on every practice start.
+    """
+    claimed = SENTENCE_BANK.claim_refill(level, words)
+    if not claimed:
+        return
+
+    def task():
+        try:
+            short = SENTENCE_BANK.short_words(level, claimed, SENTENCE_BANK_VARIANTS)
+            if short:
+                fill_sentence_bank(level, short)
+        except Exception:
+            print(traceback.format_exc())
+        finally:
+            SENTENCE_BANK.release_refill(level, claimed)
+
+    BACKGROUND_EXECUTOR.submit(
+        task, priority=PRIORITY_SPECULATIVE,
+        on_reject=lambda: SENTENCE_BANK.release_refill(level, claimed),
+    )
+
+
+def _bank_deck_sentences(level, words, anki_sentences):
+    """Store the deck's generated sentences for ``words`` once the deck batch has translated them."""
+    word_model = MODEL_ROUTER.primary('word_translation')['model']
+    sentence_model = MODEL_ROUTER.primary('sentence_translation')['model']
+    for word in words:
+        sentence = _lookup_sentence_for_word(anki_sentences, word)
+        if not sentence:
+            continue
+        word_translation = TRANSLATION_CACHE.get(WORD_TRANSLATION_PROMPT_VERSION, word_model, word)
+        sentence_translation = TRANSLATION_CACHE.get(SENTENCE_TRANSLATION_PROMPT_VERSION, sentence_model, sentence)
+        if word_translation and sentence_translation:
+            SENTENCE_BANK.add(level, word, word_translation, [(sentence, sentence_translation)])
+
+
+def _seed_banked_translations(banked):
+    """Put the bank's translations into TRANSLATION_CACHE so the deck batch and per-card path find them."""
+    word_model = MODEL_ROUTER.primary('word_translation')['model']
+    sentence_model = MODEL_ROUTER.primary('sentence_translation')['model']
+    for word, entry in banked.items():
+        TRANSLATION_CACHE.set(WORD_TRANSLATION_PROMPT_VERSION, word_model, word, entry['word_translation'])
+        TRANSLATION_CACHE.set(SENTENCE_TRANSLATION_PROMPT_VERSION, sentence_model, entry['sentence'], entry['sentence_translation'])
+
+
+def _banked_deck_json(banked, generated=None):
+    sentences = {word: entry['sentence'] for word, entry in banked.items()}
+    if generated:
+        try:
+            parsed = json.loads(generated)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict):
+            sentences.update(parsed)
+    return json.dumps(sentences, ensure_ascii=False)
+
+
 def create_anki_english_sentences(selected_words):
     # Function to get Anki sentences in 1 go in JSON format using Responses API.
-    # Starts a background task and does not wait for completion
+    # Words in the sentence bank are served from there; only the rest go to the
+    # model, in a background task that this does not wait for.
     session_key = session.sid
     _prune_background_jobs()
-    anki_sentences_jobs[session_key] = {
-        'status': 'in_progress',
-        'created_at': datetime.utcnow().isoformat(),
-    }
+    job_id = uuid.uuid4().hex
+    anki_sentences_jobs.put(session_key, {'status': 'in_progress', 'job_id': job_id}, session_key)
 
-    # Capture level while inside request context; do not access session in thread
+    def finish(**result):
+        # A newer deck may have replaced this job; never overwrite its state
+        anki_sentences_jobs.update(session_key, result, match={'job_id': job_id})
+
+    # Capture level and card order while inside request context; do not access session in thread
     level = get_selected_level()
+    # selected_words may be shuffled; the deck batch numbers cards in session order
+    deck_words = [row[0] for row in session.get('selected_words_lineNumber') or []] or selected_words
+    banked = {}
+    if SENTENCE_BANK_ENABLED:
+        banked = SENTENCE_BANK.take(level, selected_words)
+        _start_sentence_bank_refill(level, list(banked))
+    missing_words = [word for word in selected_words if word not in banked]
+
+    if not missing_words:
+        # Whole deck came from the bank: ready before the first card renders
+        response = _banked_deck_json(banked)
+        finish(status='done', response=response)
+
+        def translate_banked():
+            _seed_banked_translations(banked)
+            if (anki_sentences_jobs.get(session_key) or {}).get('job_id') == job_id:
+                _translate_anki_deck(session_key, deck_words, response)
+
+        BACKGROUND_EXECUTOR.submit(translate_banked, priority=PRIORITY_INTERACTIVE)
+        return
 
     def task(level_param):
+        _seed_banked_translations(banked)
         prompt = f"""
             You are creating example sentences for vocabulary review at level {level_param}.
-            1) For each of these words, write exactly one simple, natural German sentence: {', '.join(selected_words)}.
+            1) For each of these words, write exactly one simple, natural German sentence: {', '.join(missing_words)}.
             2) Constraint: Use only nouns, verbs and adjectives that are part of the Goethe-Zertifikat {level_param} vocabulary list. Do not use any noun or verb that is outside this list.
                Function words (articles, pronouns, prepositions, conjunctions) are allowed as needed.
             3) Keep grammar and vocabulary appropriate for level {level_param}.
@@ -643,8 +3384,7 @@ def create_anki_english_sentences(selected_words):
         try:
             resp = get_completion_from_messages(
                 messages,
-                model="gpt-5-mini",
-                max_tokens=2000,
+                task='deck_sentences',
                 text_format={"type": "json_object"},
             )
             cleaned = resp.strip()
@@ -652,22 +3392,30 @@ def create_anki_english_sentences(selected_words):
             if cleaned.lower().startswith('json'):
                 cleaned = cleaned[4:].strip()
             cleaned = cleaned.strip('`')
-            anki_sentences_jobs[session_key] = {
-                'status': 'done',
-                'response': cleaned,
-                'created_at': datetime.utcnow().isoformat(),
-            }
+            if banked:
+                cleaned = _banked_deck_json(banked, cleaned)
+            finish(status='done', response=cleaned)
         except Exception as e:
-            anki_sentences_jobs[session_key] = {
-                'status': 'error',
-                'error': str(e),
-                'created_at': datetime.utcnow().isoformat(),
-            }
+            finish(status='error', error=str(e))
+            return
+        # Skip the batch if a newer deck replaced this one meanwhile
+        if (anki_sentences_jobs.get(session_key) or {}).get('job_id') == job_id:
+            _translate_anki_deck(session_key, deck_words, cleaned)
+        if SENTENCE_BANK_ENABLED:
+            _bank_deck_sentences(level_param, missing_words, cleaned)
 
-    Thread(target=task, args=(level,), daemon=True).start()
+    def reject():
+        finish(status='error', error='Server is busy, please try again')
+
+    BACKGROUND_EXECUTOR.submit(task, level, priority=PRIORITY_INTERACTIVE, on_reject=reject)
 
 def resolve_anki_sentences(timeout_seconds=90):
-    """Ensure generated Anki sentences are available in the current session."""
+    """Ensure generated Anki sentences are available in the current session.
+
+    Waits up to ``timeout_seconds`` for the background job, waking as soon as
+    it finishes; ``timeout_seconds=0`` only checks. Returns None while the
+    sentences are not ready.
+    """
     _prune_background_jobs()
     if session.get('anki_sentences'):
         return session['anki_sentences']
@@ -677,9 +3425,9 @@ def resolve_anki_sentences(timeout_seconds=90):
         selected_words = [row[0] for row in session['selected_words_lineNumber']]
         create_anki_english_sentences(selected_words)
 
-    deadline = time.time() + timeout_seconds
-    while time.time() < deadline:
-        job = anki_sentences_jobs.get(session_key)
+    deadline = time.monotonic() + timeout_seconds
+    version, job = anki_sentences_jobs.get_with_version(session_key)
+    while True:
         if job and job.get('status') == 'done':
             response = job.get('response', '')
             session['anki_sentences'] = response
@@ -688,9 +3436,20 @@ def resolve_anki_sentences(timeout_seconds=90):
             error = job.get('error', 'Error generating Anki sentences')
             session['anki_sentences'] = 'Error'
             return f"Error: {error}"
-        time.sleep(0.5)
 
-    return None
+        remaining = deadline - time.monotonic()
+        if not job or remaining <= 0:
+            return None
+        version, job = anki_sentences_jobs.wait(session_key, version, remaining)
+
+
+def anki_sentences_in_progress():
+    job = anki_sentences_jobs.get(session.sid)
+    return bool(job) and job.get('status') == 'in_progress'
+
+
+def _retry_later(message, status=503):
+    return message, status, {'Retry-After': str(ANKI_SENTENCES_RETRY_AFTER_SECONDS)}
 
 def save_to_csv():
     file_path = get_current_wortlist_file()
@@ -700,16 +3459,8 @@ def save_to_csv():
         for row in selected_words_lineNumber
     }
 
-    with open(file_path, 'r', newline='') as file:
-        rows = list(csv.reader(file))
-
-    for index, updated_row in rows_to_update.items():
-        if 0 <= index < len(rows):
-            rows[index] = updated_row
-
-    with open(file_path, 'w', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerows(rows)
+    if not WORTLIST_STORE.commit(file_path, rows_to_update):
+        print(f"Wortlist file missing: {file_path}")
 
 
 def start_story_generation(scenario_text):
@@ -718,15 +3469,18 @@ def start_story_generation(scenario_text):
 
     session_key = session.sid
     _prune_background_jobs()
-    story_results[session_key] = {
+    story_results.put(session_key, {
         'german_status': 'in_progress',
         'english_status': 'pending',
         'german': '',
         'english': '',
-        'created_at': datetime.utcnow().isoformat(),
-    }
+    }, session_key)
     wortlist_file = session.get("wortlist_file", DEFAULT_WORTLIST_FILE)
-    Thread(target=generate_story_background, args=(session_key, wortlist_file, scenario_text), daemon=True).start()
+    BACKGROUND_EXECUTOR.submit(
+        generate_story_background, session_key, wortlist_file, scenario_text,
+        priority=PRIORITY_STORY,
+        on_reject=lambda: _fail_story_job(session_key, 'german', "Error generating story: server is busy, please try again"),
+    )
 
 
 @app.route('/story_scenario', methods=['POST'])
@@ -775,8 +3529,12 @@ def stats_and_start_anki():
 
 @app.route('/ankiSentencesResponse', methods=['POST','GET'])
 def ankiSentencesResponse():
-    # Block until the background job (Responses API) finishes, then return the JSON string
-    response = resolve_anki_sentences()
+    # Long-poll: wait (at most ?wait= seconds, default 90) for the background job,
+    # then return the JSON string; ?wait=0 returns immediately with a retry hint.
+    wait_seconds = max(0, min(request.args.get('wait', 90, type=float), 90))
+    response = resolve_anki_sentences(timeout_seconds=wait_seconds)
+    if response is None and anki_sentences_in_progress():
+        return _retry_later('Anki sentences are still being generated', 202)
     if response is None:
         return 'Timed out waiting for Anki sentences', 504
     if response.startswith('Error:'):
@@ -797,7 +3555,8 @@ def anki():
         selected_words_lineNumber = active_state['selected_words_lineNumber']
         selected_words_position = active_state['selected_words_position']
 
-        if not resolve_anki_sentences():
+        # The page long-polls /ankiSentence itself, so only bail out if nothing is coming
+        if not resolve_anki_sentences(timeout_seconds=0) and not anki_sentences_in_progress():
             flash('Still generating Anki sentences — please try Practice Vocabulary again in a moment.', 'warning')
             return redirect_to_home()
 
@@ -835,9 +3594,9 @@ def ankiSentence():
 
             wort = session.get('anki_word') or selected_words_lineNumber[selected_words_position][0]
             session['anki_word'] = wort
-            anki_sentences = resolve_anki_sentences()
+            anki_sentences = resolve_anki_sentences(timeout_seconds=ANKI_SENTENCES_LONG_POLL_SECONDS)
             if not anki_sentences:
-                return "Still generating sentence. Please try again in a moment.", 503
+                return _retry_later("Still generating sentence. Please try again in a moment.")
             if anki_sentences.startswith('Error:') or anki_sentences == 'Error':
                 return anki_sentences, 500
             anki_sentence_for_wort = _lookup_sentence_for_word(anki_sentences, wort)
@@ -948,7 +3707,8 @@ def anki_prefetch():
         return jsonify({'ok': False, 'error': 'No sentence available in session'}), 400
 
     started = _start_anki_prefetch(number, wort, german_sentence)
-    return jsonify({'ok': started})
+    lookahead = _start_anki_lookahead(active_state, _get_session_id())
+    return jsonify({'ok': started, 'lookahead': lookahead})
 
 
 @app.route('/anki_image_hint', methods=['POST'])
@@ -971,28 +3731,15 @@ def anki_image_hint():
     if not sentence or sentence.startswith('Failed to') or sentence == 'Error':
         return jsonify({'ok': False, 'error': 'No usable sentence available for this card'}), 400
 
-    image_prompt = sentence
-
     try:
-        response = openai_post("/images/generations", {
-            "model": "gpt-image-2",
-            "prompt": image_prompt,
-            "n": 1,
-            # gpt-image-2 supports arbitrary sizes, but 512x512 is below the
-            # current minimum pixel budget in production. Use the smallest
-            # standard size from the current spec.
-            "size": "1024x1024",
-            "quality": "low",
-            "output_format": "webp",
-        })
-        image_base64 = response.get("data", [{}])[0].get("b64_json")
-        if not image_base64:
-            return jsonify({'ok': False, 'error': 'Image generation returned no image'}), 502
-        filename = _save_generated_image(image_base64, sentence)
-        image_url = f"./generated_images/{filename}"
+        files = get_image_hint(sentence)
+        full_width = int(IMAGE_HINT_PARAMS['size'].split('x')[0])
+        # The page picks a size via srcset; every URL is immutable
+        variants = {width or full_width: f"./generated_images/{filename}" for width, filename in files.items()}
         return jsonify({
             'ok': True,
-            'image_url': image_url
+            'image_url': variants[full_width],
+            'image_srcset': ', '.join(f"{url} {width}w" for width, url in sorted(variants.items())),
         })
     except Exception as e:
         return jsonify({'ok': False, 'error': str(e)}), 502
@@ -1000,8 +3747,20 @@ def anki_image_hint():
 
 @app.route('/generated_images/<path:filename>')
 def generated_image_file(filename):
-    _prune_generated_images()
-    return send_from_directory(GENERATED_IMAGES_DIR, filename, mimetype='image/webp')
+    GENERATED_IMAGES.start_janitor(IMAGE_JANITOR_INTERVAL_SECONDS)
+    if not GENERATED_IMAGES.has_file(filename):
+        abort(404)
+    match = GENERATED_IMAGE_NAME.match(filename)
+    response = send_from_directory(
+        GENERATED_IMAGES_DIR, filename, mimetype='image/webp',
+        # The name embeds the content digest, so it can serve as a strong ETag
+        etag=f"{match.group(2)}-{match.group(3) or 'full'}",
+        max_age=GENERATED_IMAGE_CACHE_SECONDS,
+        conditional=True,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
 
 
 @app.route('/anki_poll', methods=['GET'])
@@ -1034,7 +3793,32 @@ def anki_poll():
         payload['sentence_translation'] = job.get('sentence_translation', '')
     return jsonify(payload)
 
+def translateWordToEnglish(wort):
+    # Cached answers are keyed by the task's first-tier model, whichever tier served them
+    model = MODEL_ROUTER.primary('word_translation')['model']
+    cached = TRANSLATION_CACHE.get(WORD_TRANSLATION_PROMPT_VERSION, model, wort)
+    if cached is not None:
+        return cached
+
+    messages = [
+        {'role': 'system', 'content': 'Respond with a single English word only. No sentences or explanations.'},
+        {'role': 'user', 'content': 'One Word English translation for: Klima'},
+        {'role': 'assistant', 'content': 'Climate'},
+        {'role': 'user', 'content': f'One Word English translation for: {wort}'},
+    ]
+    # The route leaves max_output_tokens at the model default and sets verbosity low for concise output
+    wordTranslation = get_completion_from_messages(messages, task='word_translation').strip()
+    if wordTranslation:
+        TRANSLATION_CACHE.set(WORD_TRANSLATION_PROMPT_VERSION, model, wort, wordTranslation)
+
+    return wordTranslation
+
 def translateToEnglish(germanText):
+    model = MODEL_ROUTER.primary('sentence_translation')['model']
+    cached = TRANSLATION_CACHE.get(SENTENCE_TRANSLATION_PROMPT_VERSION, model, germanText)
+    if cached is not None:
+        return cached
+
     messages = [
         {'role': 'system',
          'content': f"""
@@ -1046,7 +3830,9 @@ def translateToEnglish(germanText):
          }
     ]
 
-    englishVersion = get_completion_from_messages(messages, model="gpt-5-nano", max_tokens=100)
+    englishVersion = get_completion_from_messages(messages, task='sentence_translation')
+    if englishVersion.strip():
+        TRANSLATION_CACHE.set(SENTENCE_TRANSLATION_PROMPT_VERSION, model, germanText, englishVersion)
 
     return englishVersion
 
@@ -1064,7 +3850,7 @@ def correctSpellingGrammar(germanText):
     ]
     # print("correctSpellingGrammar:")
     # print(messages)
-    correctSpellingGrammarVersion = get_completion_from_messages(messages, model="gpt-5-mini", max_tokens=500)
+    correctSpellingGrammarVersion = get_completion_from_messages(messages, task='grammar_check')
     # print(correctSpellingGrammarVersion)
 
     return correctSpellingGrammarVersion
@@ -1101,6 +3887,65 @@ def story_progress():
         payload['english'] = result.get('english', '')
     return jsonify(payload)
 
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.route('/story_stream', methods=['GET'])
+def story_stream():
+    """Push the German story to the page over server-sent events as it is written.
+
+    ``german`` events carry ``{offset, delta, status}``: the client keeps the
+    first ``offset`` characters it already has and appends ``delta``. An
+    ``english`` event follows once the translation lands, then ``done``.
+    """
+    _prune_background_jobs()
+    session_key = session.sid
+
+    def events():
+        sent_chars = 0
+        sent_german_status = None
+        sent_english_status = None
+        seen_version = None
+        deadline = time.monotonic() + STORY_STREAM_MAX_SECONDS
+        while time.monotonic() < deadline:
+            version, result = story_results.get_with_version(session_key)
+            if result is not None and version == seen_version:
+                version, result = story_results.wait(session_key, version, STORY_STREAM_HEARTBEAT_SECONDS)
+            if result is None:
+                yield _sse_event('expired', {})
+                return
+            if version == seen_version:
+                yield ": keepalive\n\n"
+                continue
+            seen_version = version
+
+            german_status = result.get('german_status', 'in_progress')
+            german = result.get('german', '')
+            if german_status in ('done', 'error') and german_status != sent_german_status:
+                # The final text is stripped, so resend it whole rather than as a delta
+                yield _sse_event('german', {'offset': 0, 'delta': german, 'status': german_status})
+                sent_chars = len(german)
+                sent_german_status = german_status
+            elif german_status not in ('done', 'error') and len(german) > sent_chars:
+                yield _sse_event('german', {'offset': sent_chars, 'delta': german[sent_chars:], 'status': german_status})
+                sent_chars = len(german)
+
+            english_status = result.get('english_status', 'pending')
+            if english_status in ('done', 'error') and english_status != sent_english_status:
+                yield _sse_event('english', {'text': result.get('english', ''), 'status': english_status})
+                sent_english_status = english_status
+
+            if sent_german_status == 'error' or (sent_german_status and sent_english_status):
+                yield _sse_event('done', {})
+                return
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Stop reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no',
+    })
+
 @app.route('/german_story_with_translation', methods=['POST','GET'])
 def german_story_with_translation():
     _prune_background_jobs()
@@ -1108,7 +3953,7 @@ def german_story_with_translation():
     german_text = ''
     english_text = ''
     if result:
-        if result.get('german_status') == 'done':
+        if result.get('german_status') == 'done' or result.get('german'):
             german_text = result.get('german', '')
         else:
             german_text = 'Brewing a German story… this usually takes ~1–2 minutes. More time to think about how far you have come in your German language learning journey!'
@@ -1176,6 +4021,244 @@ def germanConversation():
     log_datetime()
     return render_template('germanConversation.html')
 
+def _estimate_tokens(text):
+    # Roughly 4 characters per token for German/English, plus per-message overhead
+    return len(text or '') // 4 + 4
+
+
+def _conversation_window_start(turns, budget):
+    """Index of the oldest turn in the most recent run of turns that fits ``budget``."""
+    used = 0
+    start = len(turns)
+    while start > 0:
+        cost = _estimate_tokens(turns[start - 1]['content'])
+        # The newest turn is always sent, even if it alone exceeds the budget
+        if used + cost > budget and start < len(turns):
+            break
+        used += cost
+        start -= 1
+    return start
+
+
+def _conversation_context(conversationMessages, summary):
+    """Messages to send: system prompt, running summary, then the recent-turn window."""
+    system_message, turns = conversationMessages[0], conversationMessages[1:]
+    context = [system_message]
+    if summary:
+        context.append({'role': 'system', 'content': f"Summary of the conversation so far: {summary}"})
+    return context + turns[_conversation_window_start(turns, CONVERSATION_CONTEXT_TOKENS):]
+
+
+def _apply_conversation_summary(session_key, conversation_id, conversationMessages):
+    """Fold a finished background summary into the session; returns the trimmed messages."""
+    job = conversation_summary_jobs.get(session_key)
+    if not job or job.get('status') == 'in_progress':
+        return conversationMessages
+    conversation_summary_jobs.pop(session_key, None)
+    if job.get('status') != 'done' or job.get('conversation_id') != conversation_id:
+        return conversationMessages
+    session['conversationSummary'] = job['summary']
+    return conversationMessages[:1] + conversationMessages[1 + job['folded']:]
+
+
+def _start_conversation_summary(session_key, conversation_id, summary, conversationMessages):
+    """Summarize the turns that fell out of the window, in the background."""
+    turns = conversationMessages[1:]
+    folded = _conversation_window_start(turns, CONVERSATION_CONTEXT_TOKENS)
+    if folded < CONVERSATION_SUMMARY_BATCH_TURNS or session_key in conversation_summary_jobs:
+        return
+    conversation_summary_jobs.put(session_key, {'status': 'in_progress', 'conversation_id': conversation_id}, session_key)
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns[:folded])
+
+    def task():
+        messages = [
+            {'role': 'system', 'content': 'Summarize this German conversation in a few short sentences, in German. '
+                                          'Keep names, facts and open questions; drop greetings and small talk.'},
+            {'role': 'user', 'content': f"Summary so far: {summary or '(none)'}\n\nNew turns:\n{transcript}"},
+        ]
+        try:
+            new_summary = get_completion_from_messages(messages, task='chat_summary')
+            conversation_summary_jobs.update(session_key, {'status': 'done', 'summary': new_summary.strip(), 'folded': folded})
+        except Exception as e:
+            conversation_summary_jobs.update(session_key, {'status': 'error', 'error': str(e)})
+
+    BACKGROUND_EXECUTOR.submit(
+        task, priority=PRIORITY_SPECULATIVE,
+        # Shed under load: the window still bounds the prompt, and the next turn retries
+        on_reject=lambda: conversation_summary_jobs.pop(session_key, None),
+    )
+
+
+def _conversation_request_args(conversationMessages, summary, previous_response_id=None):
+    """Responses API payloads to try in order for the latest user turn.
+
+    With a ``previous_response_id`` only the new user message is sent and the
+    server supplies the earlier context; the windowed context follows as a
+    fallback in case the stored response has expired.
+    """
+    profile = MODEL_ROUTER.route('chat')
+    route_args = (profile['model'], profile['max_tokens'], profile['effort'], profile['verbosity'], None)
+    attempts = []
+    if previous_response_id:
+        create_args = _completion_args(conversationMessages[-1:], *route_args)
+        create_args.update(previous_response_id=previous_response_id, store=True, truncation="auto")
+        attempts.append(create_args)
+    create_args = _completion_args(_conversation_context(conversationMessages, summary), *route_args)
+    if CONVERSATION_CHAIN_RESPONSES:
+        create_args["store"] = True
+    attempts.append(create_args)
+    return attempts
+
+
+def _conversation_reply(conversationMessages, summary, previous_response_id=None):
+    """Return ``(reply_text, response_id)`` for the latest user turn."""
+    *chained, windowed = _conversation_request_args(conversationMessages, summary, previous_response_id)
+    with MODEL_ROUTER.timed('chat', _args_profile(windowed)):
+        for create_args in chained:
+            try:
+                resp = openai_post("/responses", create_args)
+                return extract_response_text(resp), resp.get("id")
+            except Exception:
+                print(traceback.format_exc())
+        resp = openai_post("/responses", windowed)
+    return extract_response_text(resp), resp.get("id")
+
+
+def _args_profile(create_args):
+    """The routing profile a prepared Responses payload was built from."""
+    return {'model': create_args['model'], 'effort': create_args['reasoning']['effort']}
+
+
+def _stream_conversation_reply(session_key, turn_id, attempts):
+    """Background task: stream the reply into conversation_reply_jobs as it is written."""
+    match = {'turn_id': turn_id}
+    for attempt, create_args in enumerate(attempts, start=1):
+        text = ''
+        response_id = None
+        published_at = 0.0
+        try:
+            with MODEL_ROUTER.timed('chat', _args_profile(create_args)):
+                for event in openai_stream("/responses", create_args):
+                    event_type = event.get("type")
+                    if event_type == "response.created":
+                        response_id = (event.get("response") or {}).get("id")
+                    elif event_type == "response.output_text.delta":
+                        text += event.get("delta", "")
+                        if time.monotonic() - published_at >= STORY_STREAM_PUBLISH_SECONDS:
+                            conversation_reply_jobs.update(session_key, {'text': text}, match=match)
+                            published_at = time.monotonic()
+                    elif event_type in ("response.failed", "error"):
+                        error = event.get("error") or (event.get("response") or {}).get("error") or event_type
+                        raise RuntimeError(f"OpenAI streaming error: {error}")
+            if not text.strip():
+                raise RuntimeError("OpenAI response did not include output text.")
+            conversation_reply_jobs.update(session_key, {
+                'status': 'done', 'text': text.strip(), 'response_id': response_id,
+            }, match=match)
+            _start_conversation_review(session_key, turn_id, 'translation', translateToEnglish, text.strip())
+            return
+        except Exception as e:
+            print(traceback.format_exc())
+            # Only retry the windowed context if nothing was shown yet
+            if text or attempt == len(attempts):
+                conversation_reply_jobs.update(session_key, {'status': 'error', 'error': str(e)}, match=match)
+                conversation_review_jobs.update(session_key, {
+                    'translation_status': 'error', 'translation': f"Error: {e}",
+                }, match=match)
+                return
+            conversation_reply_jobs.update(session_key, {'text': ''}, match=match)
+
+
+def _start_conversation_review(session_key, turn_id, kind, fn, text):
+    """Run ``fn(text)`` in the background and store it as the turn's ``kind`` result."""
+    match = {'turn_id': turn_id}
+    conversation_review_jobs.update(session_key, {f'{kind}_status': 'in_progress'}, match=match)
+
+    def task():
+        try:
+            fields = {kind: fn(text), f'{kind}_status': 'done'}
+        except Exception as e:
+            fields = {kind: f"Error: {e}", f'{kind}_status': 'error'}
+        conversation_review_jobs.update(session_key, fields, match=match)
+
+    BACKGROUND_EXECUTOR.submit(
+        task, priority=PRIORITY_INTERACTIVE,
+        on_reject=lambda: conversation_review_jobs.update(session_key, {
+            kind: "Error: server is busy, please retry", f'{kind}_status': 'error',
+        }, match=match),
+    )
+
+
+def _await_conversation_review(kind, wait_seconds):
+    """Return ``(status, result)`` for the current turn, waiting for it if in flight.
+
+    Returns ``('pending', None)`` if the job is still running after
+    ``wait_seconds``, and None when no job covers this turn, so the caller
+    computes it inline.
+    """
+    turn_id = session.get('conversationTurn')
+    session_key = _get_session_id()
+    deadline = time.monotonic() + wait_seconds
+    version, job = conversation_review_jobs.get_with_version(session_key)
+    while job and job.get('turn_id') == turn_id:
+        if job.get(f'{kind}_status') in ('done', 'error'):
+            return job[f'{kind}_status'], job[kind]
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return 'pending', None
+        version, job = conversation_review_jobs.wait(session_key, version, remaining)
+    return None
+
+
+def _commit_conversation_reply(wait_seconds=0):
+    """Move a finished streamed reply into the session (messages, youSayText).
+
+    Streaming responses cannot write the session, so the next request that
+    needs the reply does it. Waits up to ``wait_seconds`` for the stream to
+    finish; returns the job as last seen, or None if there is nothing pending.
+    """
+    turn_id = session.get('conversationPendingTurn')
+    if not turn_id:
+        return None
+    session_key = _get_session_id()
+    deadline = time.monotonic() + wait_seconds
+    version, job = conversation_reply_jobs.get_with_version(session_key)
+    while job and job.get('turn_id') == turn_id and job.get('status') == 'in_progress':
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return job
+        version, job = conversation_reply_jobs.wait(session_key, version, remaining)
+
+    session.pop('conversationPendingTurn', None)
+    conversationMessages = session.get('conversationMessages', [])
+    if not job or job.get('turn_id') != turn_id or job.get('status') != 'done':
+        # Drop the unanswered user turn so the history stays well-formed
+        if len(conversationMessages) > 1 and conversationMessages[-1]['role'] == 'user':
+            session['conversationMessages'] = conversationMessages[:-1]
+        return job
+    conversation_reply_jobs.pop(session_key, None)
+    conversationMessages.append({'role': 'assistant', 'content': job['text']})
+    session['conversationMessages'] = conversationMessages
+    session['youSayText'] = job['text']
+    if CONVERSATION_CHAIN_RESPONSES and job.get('response_id'):
+        session['conversationResponseId'] = job['response_id']
+    _start_conversation_summary(
+        session_key, session.get('conversationId'), session.get('conversationSummary'), conversationMessages,
+    )
+    return job
+
+
+def _reset_conversation(conversationMessages):
+    session['conversationMessages'] = conversationMessages
+    session['conversationId'] = uuid.uuid4().hex
+    session.pop('conversationSummary', None)
+    session.pop('conversationResponseId', None)
+    session.pop('conversationPendingTurn', None)
+    conversation_summary_jobs.pop(_get_session_id(), None)
+    conversation_reply_jobs.pop(_get_session_id(), None)
+    conversation_review_jobs.pop(_get_session_id(), None)
+
+
 @app.route('/germanScenario', methods=['POST'])
 def germanScenario():
     result_data = []
@@ -1194,7 +4277,7 @@ def germanScenario():
     conversationMessages = [
         {'role': 'system', 'content': system_prompt}
     ]
-    session['conversationMessages'] = conversationMessages
+    _reset_conversation(conversationMessages)
 
     return render_template('iSay.html', result=result_data)
 
@@ -1210,17 +4293,66 @@ def iSayDynamic():
             'role': 'system',
             'content': f'You are a helpful language teacher. Respond in German and use only nouns, verbs and adjectives from the Goethe-Zertifikat {level} vocabulary list. Keep sentences simple and level-appropriate ({level}).'
         }]
+        _reset_conversation(conversationMessages)
+
+    # A reply still streaming from the previous turn has to land first
+    _commit_conversation_reply(wait_seconds=CONVERSATION_REPLY_TIMEOUT_SECONDS)
+    conversationMessages = session.get('conversationMessages', conversationMessages)
+
+    session_key = _get_session_id()
+    conversation_id = session.get('conversationId')
+    conversationMessages = _apply_conversation_summary(session_key, conversation_id, conversationMessages)
+    summary = session.get('conversationSummary')
 
     # Append the user's message
     conversationMessages.append({'role': 'user', 'content': iSayText})
+    previous_response_id = session.get('conversationResponseId') if CONVERSATION_CHAIN_RESPONSES else None
+
+    # Spell-check the user's text while the reply is being written; the
+    # translation follows as soon as the reply is done
+    turn_id = uuid.uuid4().hex
+    session['conversationTurn'] = turn_id
+    conversation_review_jobs.put(session_key, {
+        'turn_id': turn_id, 'spelling_status': 'pending', 'translation_status': 'pending',
+    }, session_key)
+    _start_conversation_review(session_key, turn_id, 'spelling', correctSpellingGrammar, iSayText)
+
+    if CONVERSATION_STREAMING:
+        # Render at once; the page streams the reply from /conversation_stream
+        session['conversationMessages'] = conversationMessages
+        session['conversationPendingTurn'] = turn_id
+        session.pop('youSayText', None)
+        conversation_reply_jobs.put(session_key, {'status': 'in_progress', 'turn_id': turn_id, 'text': ''}, session_key)
+        attempts = _conversation_request_args(conversationMessages, summary, previous_response_id)
+
+        def reject():
+            conversation_reply_jobs.update(session_key, {'status': 'error', 'error': 'Server is busy, please try again'}, match={'turn_id': turn_id})
+
+        BACKGROUND_EXECUTOR.submit(
+            _stream_conversation_reply, session_key, turn_id, attempts,
+            priority=PRIORITY_INTERACTIVE, on_reject=reject,
+        )
+        return render_template('youSayDynamic.html', result={
+            'youSayText': '',
+            'iSayText': iSayText,
+            'streaming': True,
+        })
 
-    # Get assistant reply via Responses API
-    youSayText = get_completion_from_messages(conversationMessages, model="gpt-5-mini", max_tokens=400)
+    # Get assistant reply via Responses API; only the recent window plus summary is sent
+    try:
+        youSayText, response_id = _conversation_reply(conversationMessages, summary, previous_response_id)
+    except Exception as e:
+        conversation_review_jobs.update(session_key, {'translation_status': 'error', 'translation': f"Error: {e}"})
+        raise
+    _start_conversation_review(session_key, turn_id, 'translation', translateToEnglish, youSayText)
 
     # Update conversation history
     conversationMessages.append({'role': 'assistant', 'content': youSayText})
     session['conversationMessages'] = conversationMessages
     session['youSayText'] = youSayText
+    if CONVERSATION_CHAIN_RESPONSES and response_id:
+        session['conversationResponseId'] = response_id
+    _start_conversation_summary(session_key, conversation_id, summary, conversationMessages)
 
     result_data = {
         'youSayText': youSayText,
@@ -1229,21 +4361,95 @@ def iSayDynamic():
 
     return render_template('youSayDynamic.html', result=result_data)
 
+@app.route('/conversation_stream', methods=['GET'])
+def conversation_stream():
+    """Push the assistant reply for the latest turn over server-sent events.
+
+    ``reply`` events carry ``{offset, delta}`` like the story stream; a
+    ``done`` event with the full text (or ``failed``) ends the stream. The
+    page then requests the translation, which commits the reply to the session.
+    """
+    turn_id = session.get('conversationPendingTurn')
+    session_key = _get_session_id()
+
+    def events():
+        sent_chars = 0
+        seen_version = None
+        deadline = time.monotonic() + CONVERSATION_REPLY_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            version, job = conversation_reply_jobs.get_with_version(session_key)
+            if job is not None and version == seen_version:
+                version, job = conversation_reply_jobs.wait(session_key, version, STORY_STREAM_HEARTBEAT_SECONDS)
+            if job is None or job.get('turn_id') != turn_id:
+                yield _sse_event('expired', {})
+                return
+            if version == seen_version:
+                yield ": keepalive\n\n"
+                continue
+            seen_version = version
+
+            if job.get('status') == 'done':
+                yield _sse_event('done', {'text': job['text']})
+                return
+            if job.get('status') == 'error':
+                # Not 'error': EventSource uses that name for dropped connections
+                yield _sse_event('failed', {'error': job.get('error', 'Error generating reply')})
+                return
+            text = job.get('text', '')
+            if len(text) > sent_chars:
+                yield _sse_event('reply', {'offset': sent_chars, 'delta': text[sent_chars:]})
+                sent_chars = len(text)
+            elif len(text) < sent_chars:
+                # A retry restarted the reply
+                yield _sse_event('reply', {'offset': 0, 'delta': text})
+                sent_chars = len(text)
+        yield _sse_event('expired', {})
+
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+@app.route('/conversationReply')
+def conversationReply():
+    """Wait for the streamed reply and return it whole (for pages without EventSource)."""
+    job = _commit_conversation_reply(wait_seconds=CONVERSATION_REPLY_TIMEOUT_SECONDS)
+    if job and job.get('status') == 'error':
+        return job.get('error', 'Error generating reply'), 500
+    youSayText = _get_session_text('youSayText')
+    if not youSayText:
+        return "Session expired. Please restart the conversation.", 400
+    return youSayText
+
+
 @app.route('/conversationEnglishTranslation')
 def conversationEnglishTranslation():
+    _commit_conversation_reply(wait_seconds=CONVERSATION_REPLY_TIMEOUT_SECONDS)
     youSayText = _get_session_text('youSayText')
     if not youSayText:
         return "Session expired. Please restart the conversation.", 400
-    youSayTextEnglish = translateToEnglish(youSayText)
-    return youSayTextEnglish
+    review = _await_conversation_review('translation', CONVERSATION_REPLY_TIMEOUT_SECONDS)
+    if review is None:
+        return translateToEnglish(youSayText)
+    status, youSayTextEnglish = review
+    if status == 'pending':
+        # Still running in the background; asking again beats a duplicate call
+        return _retry_later("Translation is still being prepared.")
+    return youSayTextEnglish, 200 if status == 'done' else 500
 
 @app.route('/conversationSpellGrammarCheck')
 def conversationSpellGrammarCheck():
     iSayText = _get_session_text('iSayText')
     if not iSayText:
         return "Session expired. Please restart the conversation.", 400
-    iSayTextReviewed = correctSpellingGrammar(iSayText)
-    return iSayTextReviewed
+    review = _await_conversation_review('spelling', CONVERSATION_REPLY_TIMEOUT_SECONDS)
+    if review is None:
+        return correctSpellingGrammar(iSayText)
+    status, iSayTextReviewed = review
+    if status == 'pending':
+        return _retry_later("Spelling check is still being prepared.")
+    return iSayTextReviewed, 200 if status == 'done' else 500
 
 
 
@@ -1267,9 +4473,128 @@ def get_last_run_datetime():
     except FileNotFoundError:
         return "No run history available."
 
+
+def _stat_samples(stats, keys, label):
+    return [({label: key}, stats.get(key, 0)) for key in keys]
+
+
+def _collect_runtime_metrics():
+    """Scrape-time gauges and counters from the stores, caches and executor."""
+    job_stores = {
+        'story': story_results,
+        'anki_sentences': anki_sentences_jobs,
+        'anki_translation': anki_translation_jobs,
+        'conversation_summary': conversation_summary_jobs,
+        'conversation_reply': conversation_reply_jobs,
+        'conversation_review': conversation_review_jobs,
+    }
+    executor = BACKGROUND_EXECUTOR.stats()
+    pool = OPENAI_POOL.stats()
+    translation_cache = TRANSLATION_CACHE.stats()
+    wortlist_cache = WORTLIST_CACHE.stats()
+    images = GENERATED_IMAGES.stats()
+    sentence_bank = SENTENCE_BANK.stats()
+    families = [
+        ('job_store_jobs', 'gauge', 'Live jobs per background job store.',
+         [({'store': name}, len(registry)) for name, registry in job_stores.items()]),
+        ('process_threads', 'gauge', 'Threads alive in this process.', [({}, threading.active_count())]),
+        ('background_workers', 'gauge', 'Background executor worker threads.', [({}, executor['workers'])]),
+        ('background_running_tasks', 'gauge', 'Background tasks running now.', [({}, executor['running'])]),
+        ('background_queue_depth', 'gauge', 'Background tasks waiting, by priority.',
+         [({'priority': str(priority)}, executor['queue_depth_by_priority'].get(priority, 0))
+          for priority in (PRIORITY_INTERACTIVE, PRIORITY_STORY, PRIORITY_SPECULATIVE)]),
+        ('background_tasks_total', 'counter', 'Background tasks by outcome.',
+         _stat_samples(executor, ('submitted', 'completed', 'failed', 'rejected', 'shed', 'cancelled'), 'outcome')),
+        ('openai_pool_events_total', 'counter', 'OpenAI connection pool events.',
+         _stat_samples(pool, ('hits', 'misses', 'handshakes', 'expired'), 'event')),
+        ('openai_pool_idle_connections', 'gauge', 'Idle pooled OpenAI connections.', [({}, pool['idle'])]),
+        ('openai_breaker_state', 'gauge', 'OpenAI circuit breaker state (1 for the current state).',
+         [({'state': state}, int(OPENAI_BREAKER.state == state)) for state in ('closed', 'half_open', 'open')]),
+        ('translation_cache_events_total', 'counter', 'Translation cache events.',
+         _stat_samples(translation_cache, ('memory_hits', 'disk_hits', 'misses', 'writes', 'evictions'), 'event')),
+        ('wortlist_store_events_total', 'counter', 'Wortlist store operations.',
+         _stat_samples(WORTLIST_STORE.stats(), ('commits', 'exports', 'imports'), 'event')),
+        ('wortlist_cache_events_total', 'counter', 'Parsed wortlist cache events.',
+         _stat_samples(wortlist_cache, ('hits', 'loads'), 'event')),
+        ('model_route_p95_seconds', 'gauge', 'Rolling p95 latency per routed task tier.', [
+            ({'task': task, 'model': tier['model'], 'effort': tier.get('effort', 'minimal')}, p95)
+            for task, tier, p95, _ in MODEL_ROUTER.stats() if p95 is not None
+        ]),
+        ('model_route_budget_seconds', 'gauge', 'Latency budget per routed task.', [
+            ({'task': task}, route['budget_seconds'])
+            for task, route in MODEL_ROUTER.routes().items() if route.get('budget_seconds')
+        ]),
+        ('sentence_bank_events_total', 'counter', 'Sentence bank lookups, writes and retired variants.',
+         _stat_samples(sentence_bank, ('hits', 'misses', 'writes', 'retired'), 'event')),
+        ('sentence_bank_sentences', 'gauge', 'Current-version sentences in the bank.', [({}, sentence_bank['sentences'])]),
+        ('generated_images', 'gauge', 'Image hints kept on disk.', [({}, images['images'])]),
+        ('generated_image_bytes', 'gauge', 'Bytes used by image hints.', [({}, images['bytes'])]),
+    ]
+    session_stats = getattr(app.session_interface, 'stats', None)
+    if session_stats:
+        sessions = session_stats()
+        families += [
+            ('sessions', 'gauge', 'Stored sessions.', [({}, sessions.get('sessions', 0))]),
+            ('session_operations_total', 'counter', 'Session loads and saves.', _stat_samples(sessions, ('loads', 'saves'), 'op')),
+            ('session_seconds_total', 'counter', 'Time spent loading and saving sessions.',
+             [({'op': 'load'}, sessions['load_seconds_total']), ({'op': 'save'}, sessions['save_seconds_total'])]),
+            ('session_bytes_written_total', 'counter', 'Session bytes written to the store.', [({}, sessions['bytes_written'])]),
+        ]
+    return families
+
+
+METRICS.add_collector(_collect_runtime_metrics)
+
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint."""
+    if METRICS_TOKEN and request.headers.get('Authorization') != f"Bearer {METRICS_TOKEN}":
+        abort(403)
+    return Response(METRICS.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.cli.command('import-wortlist')
+@click.argument('csv_path')
+def import_wortlist_command(csv_path):
+    """Re-import a wortlist CSV into the indexed store."""
+    WORTLIST_STORE.import_csv(csv_path)
+    click.echo(f"Imported {csv_path}")
+
+
+@app.cli.command('export-wortlist')
+@click.argument('csv_path')
+@click.argument('target_path', required=False)
+def export_wortlist_command(csv_path, target_path):
+    """Export the stored rows of a wortlist back to CSV."""
+    WORTLIST_STORE.export_csv(csv_path, target_path)
+    click.echo(f"Exported {csv_path} to {target_path or csv_path}")
+
+
+@app.cli.command('build-sentence-bank')
+@click.argument('csv_paths', nargs=-1)
+@click.option('--variants', default=SENTENCE_BANK_VARIANTS, show_default=True, help='Sentences to keep per word.')
+@click.option('--workers', default=4, show_default=True, help='Batches generated in parallel.')
+@click.option('--limit', type=int, default=None, help='Fill at most this many words per wortlist.')
+def build_sentence_bank_command(csv_paths, variants, workers, limit):
+    """Pre-generate example sentences for the unburned words of each wortlist (default: A1 and A2)."""
+    for csv_path in csv_paths or ('A1Wortlist.csv', 'A2Wortlist.csv'):
+        if not WORTLIST_STORE.sync(csv_path):
+            click.echo(f"Skipping {csv_path}: file not found")
+            continue
+        level = _wortlist_level(csv_path)
+        words = [word for _, word, frequency, _ in WORTLIST_STORE.rows(csv_path) if frequency != 'B']
+        short = SENTENCE_BANK.short_words(level, words, variants)[:limit]
+        click.echo(f"{csv_path} ({level}): {len(short)} of {len(words)} words need sentences")
+        filled = fill_sentence_bank(
+            level, short, variants, workers,
+            progress=lambda done: click.echo(f"  {done}/{len(short)}"),
+        )
+        click.echo(f"{csv_path}: filled {filled} words")
+
 if __name__ == '__main__':
     app.run(debug=False, port=5000)
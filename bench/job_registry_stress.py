@@ -0,0 +1,130 @@
+"""Hammer JobRegistry from many threads and check its invariants afterwards.
+
+Threads mix put/update/get/wait/pop/clear_session on a shared registry with
+a short TTL and a small capacity, so expiry and capacity eviction run
+constantly. The script fails (exit 1) if the registry ends up inconsistent,
+if a waiter misses a wake-up, or if any operation raised.
+
+    python bench/job_registry_stress.py --threads 64 --seconds 5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def check_invariants(registry):
+    problems = []
+    with registry._lock:
+        if len(registry._jobs) > registry.max_jobs:
+            problems.append(f"{len(registry._jobs)} jobs exceed max_jobs={registry.max_jobs}")
+        indexed = set()
+        for session_key, keys in registry._by_session.items():
+            if not keys:
+                problems.append(f"empty session index entry for {session_key}")
+            for key in keys:
+                entry = registry._jobs.get(key)
+                if entry is None or entry[2] != session_key:
+                    problems.append(f"session index points at missing job {key}")
+                indexed.add(key)
+        if indexed != set(registry._jobs):
+            problems.append("session index and job table disagree")
+        expiries = [entry[0] for entry in registry._jobs.values()]
+        if expiries != sorted(expiries):
+            problems.append("eviction queue is not in expiry order")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=64)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--max-jobs', type=int, default=200)
+    parser.add_argument('--ttl-ms', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # app.py puts its data directories under the working directory
+        os.chdir(workdir)
+        sys.path.insert(0, REPO_ROOT)
+        from app import JobRegistry
+
+        registry = JobRegistry(timedelta(milliseconds=args.ttl_ms), args.max_jobs)
+        stop_at = time.monotonic() + args.seconds
+        counts = {}
+        errors = []
+        missed_wakeups = []
+        slowest = [0.0]
+        lock = threading.Lock()
+
+        def worker(seed):
+            rng = random.Random(seed)
+            local_counts = {}
+            local_slowest = 0.0
+            try:
+                while time.monotonic() < stop_at:
+                    session_key = f"s{rng.randrange(args.sessions)}"
+                    key = f"{session_key}:{rng.randrange(20)}"
+                    op = rng.choice(('put', 'put', 'update', 'update', 'get', 'get', 'wait', 'pop', 'clear', 'prune'))
+                    started = time.perf_counter()
+                    if op == 'put':
+                        registry.put(key, {'status': 'in_progress', 'n': 0}, session_key)
+                    elif op == 'update':
+                        registry.update(key, {'status': 'done', 'n': rng.randrange(1000)})
+                    elif op == 'get':
+                        registry.get(key)
+                    elif op == 'wait':
+                        version, job = registry.get_with_version(key)
+                        if job is not None:
+                            # Change the job ourselves from another thread; the wait must see it
+                            threading.Timer(0.001, registry.update, args=(key, {'poke': rng.random()})).start()
+                            new_version, _ = registry.wait(key, version, 2.0)
+                            if new_version == version:
+                                missed_wakeups.append(key)
+                    elif op == 'pop':
+                        registry.pop(key)
+                    elif op == 'clear':
+                        registry.clear_session(session_key)
+                    else:
+                        registry.prune()
+                    elapsed = time.perf_counter() - started
+                    if op != 'wait':
+                        local_slowest = max(local_slowest, elapsed)
+                    local_counts[op] = local_counts.get(op, 0) + 1
+            except Exception as e:
+                errors.append(repr(e))
+            with lock:
+                for op, count in local_counts.items():
+                    counts[op] = counts.get(op, 0) + count
+                slowest[0] = max(slowest[0], local_slowest)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        total = sum(counts.values())
+        print(f"{total} operations in {args.seconds:.1f}s ({total / args.seconds:,.0f} ops/s) across {args.threads} threads")
+        print("per operation: " + ", ".join(f"{op}={count}" for op, count in sorted(counts.items())))
+        print(f"slowest non-wait operation: {slowest[0] * 1000:.2f} ms; jobs left: {len(registry)}")
+
+        problems = check_invariants(registry) + errors
+        if missed_wakeups:
+            problems.append(f"{len(missed_wakeups)} waits missed a wake-up")
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        if problems:
+            sys.exit(1)
+        print("OK")
+
+
+if __name__ == '__main__':
+    main()
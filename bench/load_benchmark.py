@@ -0,0 +1,255 @@
+"""Run the practice journey with N concurrent users against a mock OpenAI.
+
+Starts bench/mock_openai.py in a subprocess, points app.py at it through
+OPENAI_API_BASE, serves the app from a threaded werkzeug server in this
+process and drives each simulated user through:
+
+    /story_scenario -> /stats_and_start_anki -> per card: /anki, /ankiSentence,
+    /anki_prefetch, /ankiTranslate (+ /anki_poll), /ankiRecord -> story polling
+
+Reports p50/p95/p99 latency per endpoint, then the peak thread count, RSS,
+job-store sizes and executor queue depth sampled while the users ran. The
+numbers include the client threads, which share this process.
+
+    python bench/load_benchmark.py --users 1 8 32 --responses-ms 800 --ttft-ms 400
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORTLIST_FILE = 'A1Wortlist.csv'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def write_wortlist(path, rows):
+    # A few burned words so the story prompt has vocabulary; the rest unreviewed
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Wort', 'Frequency', 'Date'])
+        for index in range(rows):
+            writer.writerow([f'Wort{index}', 'B' if index < 50 else '', ''])
+
+
+def read_rss_mb():
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def add(self, endpoint, seconds, ok):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(seconds)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+
+class User:
+    """One browser: keeps the session cookie and times every request."""
+
+    def __init__(self, port, recorder):
+        self.port = port
+        self.recorder = recorder
+        self.cookies = {}
+
+    def request(self, method, path, form=None, ok_statuses=(200, 302)):
+        body = urllib.parse.urlencode(form).encode() if form is not None else None
+        headers = {'Cookie': '; '.join(f'{name}={value}' for name, value in self.cookies.items())}
+        if body is not None:
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=300)
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            data = response.read()
+        finally:
+            conn.close()
+        elapsed = time.perf_counter() - started
+        for header in response.headers.get_all('Set-Cookie') or []:
+            name, _, value = header.split(';', 1)[0].partition('=')
+            self.cookies[name.strip()] = value
+        self.recorder.add(path.split('?', 1)[0], elapsed, response.status in ok_statuses)
+        return response.status, data
+
+    def journey(self, cards, think_seconds, poll_seconds):
+        self.request('POST', '/story_scenario', {'wortlist': WORTLIST_FILE})
+        self.request('POST', '/stats_and_start_anki', {'scenarioText': 'Ein Tag im Park'})
+        for _ in range(cards):
+            status, _ = self.request('GET', '/anki')
+            if status != 200:
+                break
+            while self.request('GET', '/ankiSentence', ok_statuses=(200, 503))[0] == 503:
+                time.sleep(poll_seconds)
+            self.request('POST', '/anki_prefetch')
+            time.sleep(think_seconds)
+            _, page = self.request('POST', '/ankiTranslate')
+            if b'thinking...' in page:
+                # The page polls with the card it rendered until both translations are in
+                query = urllib.parse.urlencode({
+                    name: json.loads(re.search(rf'const {variable} = (.*?);'.encode(), page).group(1))
+                    for name, variable in (
+                        ('number', 'currentAnkiNumber'),
+                        ('word', 'currentAnkiWord'),
+                        ('sentence_token', 'currentSentenceToken'),
+                    )
+                })
+                while True:
+                    _, poll = self.request('GET', f'/anki_poll?{query}')
+                    poll = json.loads(poll)
+                    if poll.get('word_status') in ('done', 'error') and poll.get('sentence_status') in ('done', 'error'):
+                        break
+                    time.sleep(poll_seconds)
+            time.sleep(think_seconds)
+            status, _ = self.request('POST', '/ankiRecord', {'frequency': random.choice(['T', 'W', 'M'])})
+        while True:
+            _, data = self.request('GET', '/german_story_status')
+            if json.loads(data).get('status') != 'in_progress':
+                break
+            time.sleep(poll_seconds)
+
+
+def sample_resources(app_module, stop, samples):
+    registries = {
+        name: getattr(app_module, name)
+        for name in ('story_results', 'anki_sentences_jobs', 'anki_translation_jobs')
+    }
+    while not stop.is_set():
+        sample = {
+            'threads': threading.active_count(),
+            'rss_mb': read_rss_mb(),
+            'queue_depth': app_module.BACKGROUND_EXECUTOR.stats()['queue_depth'],
+        }
+        for name, registry in registries.items():
+            sample[name] = len(registry)
+        samples.append(sample)
+        stop.wait(0.25)
+
+
+def run(app_module, port, users, args):
+    recorder = Recorder()
+    samples = []
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_resources, args=(app_module, stop, samples), daemon=True)
+    sampler.start()
+
+    journeys = []
+    journeys_lock = threading.Lock()
+
+    def user_worker():
+        user = User(port, recorder)
+        started = time.perf_counter()
+        user.journey(args.cards, args.think, args.poll)
+        with journeys_lock:
+            journeys.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=user_worker) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+        # Stagger arrivals a little, like real users
+        time.sleep(args.ramp / max(users, 1))
+    for thread in threads:
+        thread.join()
+    stop.set()
+    sampler.join()
+
+    print(f"\n== {users} user(s), journey p50 {percentile(journeys, 0.5):.2f}s  max {max(journeys):.2f}s")
+    print(f"{'endpoint':<26} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for endpoint, values in sorted(recorder.latencies.items()):
+        print(
+            f"{endpoint:<26} {len(values):>6} {recorder.errors.get(endpoint, 0):>6} "
+            f"{percentile(values, 0.5) * 1000:>9.1f} {percentile(values, 0.95) * 1000:>9.1f} "
+            f"{percentile(values, 0.99) * 1000:>9.1f}"
+        )
+    peaks = {name: max(sample[name] for sample in samples) for name in samples[0]} if samples else {}
+    print("peak " + "  ".join(
+        f"{name}={value:.0f}" if isinstance(value, float) else f"{name}={value}" for name, value in peaks.items()
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--cards', type=int, default=10, help='cards each user reviews (the app deals up to 10)')
+    parser.add_argument('--think', type=float, default=0.2, help='seconds a user looks at each page')
+    parser.add_argument('--poll', type=float, default=0.5, help='seconds between polls')
+    parser.add_argument('--ramp', type=float, default=1.0, help='seconds over which users arrive')
+    parser.add_argument('--rows', type=int, default=5000, help='rows in the synthetic wortlist')
+    parser.add_argument('--responses-ms', type=float, default=800)
+    parser.add_argument('--images-ms', type=float, default=4000)
+    parser.add_argument('--ttft-ms', type=float, default=400)
+    parser.add_argument('--token-ms', type=float, default=15)
+    parser.add_argument('--sigma', type=float, default=0.35)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    args = parser.parse_args()
+
+    mock_port = free_port()
+    mock = subprocess.Popen([
+        sys.executable, os.path.join(REPO_ROOT, 'bench', 'mock_openai.py'), '--port', str(mock_port),
+        '--responses-ms', str(args.responses_ms), '--images-ms', str(args.images_ms),
+        '--ttft-ms', str(args.ttft_ms), '--token-ms', str(args.token_ms),
+        '--sigma', str(args.sigma), '--error-rate', str(args.error_rate),
+    ], stdout=subprocess.PIPE, text=True)
+    try:
+        mock.stdout.readline()  # wait until it listens
+        os.environ['OPENAI_API_BASE'] = f'http://127.0.0.1:{mock_port}/v1'
+        os.environ.setdefault('OPENAI_API_KEY', 'mock')
+
+        with tempfile.TemporaryDirectory() as workdir:
+            # app.py puts its data files under the working directory
+            os.chdir(workdir)
+            write_wortlist(os.path.join(workdir, WORTLIST_FILE), args.rows)
+            sys.path.insert(0, REPO_ROOT)
+            import app as app_module
+            from werkzeug.serving import WSGIRequestHandler, make_server
+
+            class QuietHandler(WSGIRequestHandler):
+                def log_request(self, *args, **kwargs):
+                    pass
+
+            server = make_server('127.0.0.1', 0, app_module.app, threaded=True, request_handler=QuietHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            port = server.server_address[1]
+            for users in args.users:
+                run(app_module, port, users, args)
+            server.shutdown()
+    finally:
+        mock.terminate()
+        mock.wait()
+
+
+if __name__ == '__main__':
+    main()
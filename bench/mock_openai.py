@@ -0,0 +1,195 @@
+"""Local stand-in for the OpenAI Responses and Images endpoints used by app.py.
+
+Replies are shaped after what the app asks for (deck sentences as JSON,
+deck translations and sentence-bank entries in the requested schema,
+single-word translations, free text otherwise) so the whole user journey
+runs offline. Each call sleeps for a log-normally distributed latency;
+streamed responses send a first token after ``--ttft-ms`` and then one
+word every ``--token-ms``.
+
+    python bench/mock_openai.py --port 8900 --responses-ms 800 --images-ms 4000
+    OPENAI_API_BASE=http://127.0.0.1:8900/v1 OPENAI_API_KEY=mock flask run
+"""
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 1x1 WebP, enough for the image-hint path to save and serve
+TINY_WEBP_BASE64 = "UklGRiQAAABXRUJQVlA4IBgAAAAwAQCdASoBAAEAAwA0JaQAA3AA/vuUAAA="
+FILLER_WORDS = (
+    "der Hund läuft schnell nach Hause und die Katze schläft im Garten während "
+    "das Kind ein Buch liest und die Mutter Kaffee trinkt"
+).split()
+
+
+def sample_seconds(median_ms, sigma):
+    if median_ms <= 0:
+        return 0.0
+    return random.lognormvariate(math.log(median_ms / 1000), sigma)
+
+
+def filler_text(words):
+    return " ".join(FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(words)).capitalize() + "."
+
+
+def last_user_text(payload):
+    messages = payload.get("input") or []
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content", ""))
+    return ""
+
+
+def reply_text(payload):
+    """Pick a plausible reply for the kind of call the app made."""
+    text_format = (payload.get("text") or {}).get("format") or {}
+    prompt = last_user_text(payload)
+    if text_format.get("type") == "json_object":
+        # Deck sentences: "... natural German sentence: Wort1, Wort2, ...."
+        match = re.search(r"German sentence: (.*?)\.\s*\n", prompt)
+        words = [word.strip() for word in match.group(1).split(",")] if match else []
+        return json.dumps({word: f"Ich sehe {word} heute." for word in words}, ensure_ascii=False)
+    if text_format.get("name") == "sentence_bank":
+        # "... write 3 different simple, natural German sentences that use the word: Wort1, Wort2, ...."
+        match = re.search(r"write (\d+) different .*? use the word: (.*?)\.\s*\n", prompt)
+        variants, words = (int(match.group(1)), [word.strip() for word in match.group(2).split(",")]) if match else (0, [])
+        return json.dumps({"words": [{
+            "word": word,
+            "word_translation": f"{word}-en",
+            "sentences": [
+                {"german": f"Ich sehe {word} heute ({index}).", "english": f"I see {word} today ({index})."}
+                for index in range(1, variants + 1)
+            ],
+        } for word in words]}, ensure_ascii=False)
+    if text_format.get("type") == "json_schema":
+        cards = []
+        for line in prompt.splitlines():
+            if line.startswith("{"):
+                card = json.loads(line)
+                cards.append({
+                    "word": card["word"],
+                    "word_translation": f"{card['word']}-en",
+                    "sentence_translation": f"I see {card['word']} today.",
+                })
+        return json.dumps({"cards": cards})
+    if "One Word English translation" in prompt:
+        return prompt.rsplit(":", 1)[-1].strip() + "-en"
+    max_tokens = payload.get("max_output_tokens")
+    return filler_text(150 if max_tokens is None else max(5, min(max_tokens // 4, 40)))
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockOpenAI/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        self.server.count(self.path)
+
+        if random.random() < config.error_rate:
+            time.sleep(sample_seconds(config.responses_ms, config.sigma) / 4)
+            self._send_json(500, {"error": {"message": "mock failure", "type": "server_error"}})
+            return
+
+        if self.path.endswith("/images/generations"):
+            time.sleep(sample_seconds(config.images_ms, config.sigma))
+            self._send_json(200, {"data": [{"b64_json": TINY_WEBP_BASE64}]})
+            return
+        if not self.path.endswith("/responses"):
+            self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+
+        response_id = f"resp_{next(self.server.ids)}"
+        text = reply_text(payload)
+        usage = {"input_tokens": len(json.dumps(payload.get("input"))) // 4, "output_tokens": len(text) // 4}
+        if not payload.get("stream"):
+            time.sleep(sample_seconds(config.responses_ms, config.sigma))
+            self._send_json(200, {
+                "id": response_id,
+                "output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(body):
+            self._send_chunk(f"event: {body['type']}\ndata: {json.dumps(body)}\n\n".encode("utf-8"))
+
+        event({"type": "response.created", "response": {"id": response_id}})
+        time.sleep(sample_seconds(config.ttft_ms, config.sigma))
+        words = text.split(" ")
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(config.token_ms / 1000)
+            event({"type": "response.output_text.delta", "delta": word if index == 0 else " " + word})
+        event({"type": "response.completed", "response": {"id": response_id, "usage": usage}})
+        self._send_chunk(b"")
+
+
+class MockOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, MockOpenAIHandler)
+        self.config = config
+        self.ids = itertools.count(1)
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--responses-ms", type=float, default=800, help="median latency of non-streamed responses")
+    parser.add_argument("--images-ms", type=float, default=4000, help="median latency of image generations")
+    parser.add_argument("--ttft-ms", type=float, default=400, help="median time to first token when streaming")
+    parser.add_argument("--token-ms", type=float, default=15, help="delay between streamed words")
+    parser.add_argument("--sigma", type=float, default=0.35, help="log-normal spread of the latencies")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with a 500")
+    return parser
+
+
+def main():
+    config = build_parser().parse_args()
+    server = MockOpenAIServer((config.host, config.port), config)
+    print(f"Mock OpenAI listening on http://{config.host}:{server.server_address[1]}/v1", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
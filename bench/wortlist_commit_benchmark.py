@@ -0,0 +1,105 @@
+"""Measure deck-commit latency on one wortlist with N concurrent sessions.
+
+Each simulated session commits a 10-card deck through WortlistStore.commit,
+the path save_to_csv uses. The run reports latency percentiles, how many CSV
+exports the commits were batched into, and checks that no update was lost.
+
+    python bench/wortlist_commit_benchmark.py --rows 5000 --sessions 1 4 16 64
+"""
+import argparse
+import csv
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_wortlist(path, rows):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Wort', 'Frequency', 'Date'])
+        for index in range(rows):
+            writer.writerow([f'Wort{index}', '', ''])
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(store_class, workdir, rows, sessions):
+    csv_path = os.path.join(workdir, f'bench_{sessions}.csv')
+    write_wortlist(csv_path, rows)
+    store = store_class(os.path.join(workdir, f'bench_{sessions}.sqlite3'))
+    store.sync(csv_path)
+
+    # Give every session its own 10 lines so lost updates are detectable
+    lines = random.sample(range(1, rows + 1), sessions * 10)
+    decks = [
+        {line: [f'Wort{line - 1}', 'W', f'2030-01-{(session % 28) + 1:02d}'] for line in lines[session * 10:(session + 1) * 10]}
+        for session in range(sessions)
+    ]
+    latencies = []
+    latencies_lock = threading.Lock()
+    start_barrier = threading.Barrier(sessions)
+
+    def session_worker(deck):
+        start_barrier.wait()
+        started = time.perf_counter()
+        store.commit(csv_path, deck)
+        elapsed = time.perf_counter() - started
+        with latencies_lock:
+            latencies.append(elapsed)
+
+    before = store.stats()
+    threads = [threading.Thread(target=session_worker, args=(deck,)) for deck in decks]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    after = store.stats()
+
+    with open(csv_path, newline='') as file:
+        written = list(csv.reader(file))
+    lost = sum(
+        1 for deck in decks for line, row in deck.items()
+        if written[line] != row
+    )
+    return {
+        'sessions': sessions,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'max_ms': max(latencies) * 1000,
+        'exports': after['exports'] - before['exports'],
+        'lost_updates': lost,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000, help='rows in the synthetic wortlist')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # app.py puts its data directories under the working directory
+        os.chdir(workdir)
+        sys.path.insert(0, REPO_ROOT)
+        from app import WortlistStore
+
+        print(f"{'sessions':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'exports':>8} {'lost':>5}")
+        for sessions in args.sessions:
+            result = run(WortlistStore, workdir, args.rows, sessions)
+            print(
+                f"{result['sessions']:>8} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} "
+                f"{result['max_ms']:>9.1f} {result['exports']:>8} {result['lost_updates']:>5}"
+            )
+
+
+if __name__ == '__main__':
+    main()